@@ -10,9 +10,13 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+from ipaddress import ip_network
 from pathlib import Path
+from urllib.parse import urlsplit
 import os
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -38,6 +42,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "corsheaders",
     "battery",
@@ -48,7 +53,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "battery.middleware.TimingMiddleware",
+    "battery.nplusone.NPlusOneMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -60,6 +68,22 @@ MIDDLEWARE = [
 ]
 CORS_ORIGIN_ALLOW_ALL = True
 
+SERVER_TIMING = os.getenv("SERVER_TIMING", os.getenv("DEV")) == "true"
+METRICS_ENABLED = os.getenv("METRICS_ENABLED") == "true"
+# /metrics answers clients from these addresses or networks, and any client sending
+# "Authorization: Bearer <METRICS_TOKEN>" when a token is set.
+METRICS_ALLOWED_IPS = os.getenv("METRICS_ALLOWED_IPS", "127.0.0.1 ::1").split()
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+try:
+    [ip_network(network, strict=False) for network in METRICS_ALLOWED_IPS]
+except ValueError:
+    raise ImproperlyConfigured("METRICS_ALLOWED_IPS must list IP addresses or networks.")
+
+NPLUSONE_DETECTION = os.getenv("NPLUSONE_DETECTION", os.getenv("DEV")) == "true"
+NPLUSONE_THRESHOLD = int(os.getenv("NPLUSONE_THRESHOLD", "3"))
+NPLUSONE_RAISE = os.getenv("NPLUSONE_RAISE") == "true"
+TEST_RUNNER = "battery.testrunner.TestRunner"
+
 
 ROOT_URLCONF = "api.urls"
 
@@ -85,6 +109,16 @@ WSGI_APPLICATION = "api.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
+# Connections are kept open for DB_CONN_MAX_AGE seconds and checked before being reused.
+# DB_STATEMENT_TIMEOUT (milliseconds, 0 to disable) is sent when connecting. Behind a
+# transaction pooling proxy such as PgBouncer, set DB_POOLER_MODE=transaction: server-side
+# cursors are then disabled and the statement timeout must be set on the database role,
+# since poolers reject startup options.
+DB_POOLER_MODE = os.getenv("DB_POOLER_MODE", "session")
+if DB_POOLER_MODE not in ("session", "transaction"):
+    raise ImproperlyConfigured('DB_POOLER_MODE must be "session" or "transaction".')
+DB_STATEMENT_TIMEOUT = int(os.getenv("DB_STATEMENT_TIMEOUT", "30000"))
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
@@ -93,13 +127,64 @@ DATABASES = {
         "PORT": os.getenv("DB_PORT"),
         "USER": os.getenv("DB_USER"),
         "PASSWORD": os.getenv("DB_PASS"),
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", "60")),
+        "CONN_HEALTH_CHECKS": os.getenv("DB_CONN_HEALTH_CHECKS", "true") == "true",
+        "DISABLE_SERVER_SIDE_CURSORS": DB_POOLER_MODE == "transaction",
+        "OPTIONS": {"connect_timeout": int(os.getenv("DB_CONNECT_TIMEOUT", "5"))},
     }
 }
+if DB_POOLER_MODE == "session":
+    DATABASES["default"]["OPTIONS"]["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT}"
+
+
+# Cache
+# Throttle counters, cached tokens and users, access token revocations and pantry indexes
+# must be seen by every worker process, so production sets CACHE_URL to a shared cache:
+# redis://host:port/db (needs redis) or db://table (run createcachetable first). Without
+# it each process keeps its own in-memory cache, which is only correct for one process.
+CACHE_URL = os.getenv("CACHE_URL", "")
+CACHE_SCHEME = urlsplit(CACHE_URL).scheme
+if not CACHE_URL:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+elif CACHE_SCHEME in ("redis", "rediss"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_URL,
+        }
+    }
+elif CACHE_SCHEME == "db":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": urlsplit(CACHE_URL).netloc or "django_cache",
+        }
+    }
+else:
+    raise ImproperlyConfigured('CACHE_URL must start with "redis://", "rediss://" or "db://".')
 
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
+# Password hashing: argon2 (needs argon2-cffi), bcrypt (needs bcrypt) or pbkdf2.
+# Hashes made with another hasher or cost are upgraded on the next successful login.
+PASSWORD_HASHER = os.getenv("PASSWORD_HASHER", "pbkdf2").lower()
+if PASSWORD_HASHER not in ("argon2", "bcrypt", "pbkdf2"):
+    raise ImproperlyConfigured('PASSWORD_HASHER must be "argon2", "bcrypt" or "pbkdf2".')
+PASSWORD_HASHERS = sorted(
+    [
+        "user.hashers.TunableArgon2PasswordHasher",
+        "user.hashers.TunableBCryptSHA256PasswordHasher",
+        "user.hashers.TunablePBKDF2PasswordHasher",
+    ],
+    key=lambda path: PASSWORD_HASHER not in path.lower(),
+)
+PASSWORD_PBKDF2_ITERATIONS = int(os.getenv("PASSWORD_PBKDF2_ITERATIONS", "1000000"))
+PASSWORD_ARGON2_TIME_COST = int(os.getenv("PASSWORD_ARGON2_TIME_COST", "2"))
+PASSWORD_ARGON2_MEMORY_COST = int(os.getenv("PASSWORD_ARGON2_MEMORY_COST", "102400"))
+PASSWORD_BCRYPT_ROUNDS = int(os.getenv("PASSWORD_BCRYPT_ROUNDS", "12"))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -132,6 +217,12 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.0/howto/static-files/
 
 STATIC_URL = "static/"
+# Collected with collectstatic and served precompressed by WhiteNoise from each worker
+STATIC_ROOT = BASE_DIR / "staticfiles"
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "whitenoise.storage.CompressedStaticFilesStorage"},
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
@@ -145,8 +236,51 @@ REST_FRAMEWORK = {
         "rest_framework.authentication.SessionAuthentication",
     ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_RENDERER_CLASSES": (
+        "battery.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_THROTTLE_RATES": {
+        "login_ip": os.getenv("LOGIN_THROTTLE_IP_RATE", "30/min"),
+        "login_email": os.getenv("LOGIN_THROTTLE_EMAIL_RATE", "10/min"),
+        "signup_ip": os.getenv("SIGNUP_THROTTLE_IP_RATE", "20/hour"),
+        "signup_email": os.getenv("SIGNUP_THROTTLE_EMAIL_RATE", "5/hour"),
+    },
+    "DEFAULT_PARSER_CLASSES": (
+        "battery.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
 }
 
+# Energy journal bulk ingestion
+ENERGY_BULK_BATCH_SIZE = int(os.getenv("ENERGY_BULK_BATCH_SIZE", "500"))
+ENERGY_BULK_MAX_ROWS = int(os.getenv("ENERGY_BULK_MAX_ROWS", "10000"))
+
+# Days deletions are kept for delta sync; older cursors get a full resync
+SYNC_TOMBSTONE_RETENTION_DAYS = int(os.getenv("SYNC_TOMBSTONE_RETENTION_DAYS", "30"))
+
+# Energy journal export
+ENERGY_EXPORT_CHUNK_SIZE = int(os.getenv("ENERGY_EXPORT_CHUNK_SIZE", "2000"))
+
+# Recipe pantry matching
+PANTRY_INDEX_TIMEOUT = int(os.getenv("PANTRY_INDEX_TIMEOUT", "3600"))
+
+# Tag and ingredient autocomplete
+AUTOCOMPLETE_CACHE_TIMEOUT = int(os.getenv("AUTOCOMPLETE_CACHE_TIMEOUT", "60"))
+AUTOCOMPLETE_CACHE_USERS = int(os.getenv("AUTOCOMPLETE_CACHE_USERS", "1000"))
+AUTOCOMPLETE_MAX_CACHED_NAMES = int(os.getenv("AUTOCOMPLETE_MAX_CACHED_NAMES", "5000"))
+
+# Seconds a verified API token and its user are kept in the cache
+TOKEN_CACHE_TIMEOUT = int(os.getenv("TOKEN_CACHE_TIMEOUT", "60"))
+
+# Lifetimes in seconds of signed access tokens and their refresh tokens
+ACCESS_TOKEN_LIFETIME = int(os.getenv("ACCESS_TOKEN_LIFETIME", "300"))
+REFRESH_TOKEN_LIFETIME = int(os.getenv("REFRESH_TOKEN_LIFETIME", "1209600"))
+
+# Render list endpoints from .values() rows instead of serializer instances
+FAST_LIST_SERIALIZATION = os.getenv("FAST_LIST_SERIALIZATION") == "true"
+
 SPECTACULAR_SETTINGS = {
     "THEME": 'dark',
 }
\ No newline at end of file
@@ -1,7 +1,7 @@
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 from django.contrib import admin
 from django.urls import path, re_path, include
-from battery import views
+from battery import metrics, views
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -11,8 +11,13 @@ urlpatterns = [
         SpectacularSwaggerView.as_view(url_name="api-schema"),
         name="api-docs",
     ),
+    path("metrics", metrics.metrics, name="metrics"),
     path("api/user/", include("user.urls")),
     re_path(r"^api/energy-journal/$", views.energy_journal),
-    re_path(r"^api/energy-journal/([0-9])$", views.energy_detail),
+    re_path(r"^api/energy-journal/bulk/$", views.energy_bulk),
+    re_path(r"^api/energy-journal/rollups/$", views.energy_rollups),
+    re_path(r"^api/energy-journal/changes/$", views.energy_changes),
+    re_path(r"^api/energy-journal/export\.(csv|ndjson)$", views.energy_export),
+    re_path(r"^api/energy-journal/([0-9]+)$", views.energy_detail),
     path("api/recipe/", include("recipe.urls")),
 ]
@@ -0,0 +1,102 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models.functions import Upper
+
+# Sentinel cached for users with more names than fit in memory, who are served by the
+# database prefix index instead.
+TOO_MANY_NAMES = object()
+
+_names = OrderedDict()
+_lock = threading.Lock()
+
+
+def _cache_key(model, user_id):
+    return (model._meta.label_lower, user_id)
+
+
+def _load(model, user_id):
+    """
+    Reads a user's names sorted by their upper-cased form, if there are few enough.
+
+    Args:
+        model: Either Tag or Ingredient.
+        user_id (int): The owner of the names.
+
+    Returns:
+        list: (upper-cased name, id, name) tuples, or TOO_MANY_NAMES.
+    """
+
+    limit = settings.AUTOCOMPLETE_MAX_CACHED_NAMES
+    rows = model.objects.filter(user_id=user_id).values_list("id", "name")[: limit + 1]
+    rows = list(rows)
+    if len(rows) > limit:
+        return TOO_MANY_NAMES
+    return sorted((name.upper(), pk, name) for pk, name in rows)
+
+
+def _get(model, user_id):
+    key = _cache_key(model, user_id)
+    now = time.monotonic()
+    with _lock:
+        entry = _names.get(key)
+        if entry is not None and entry[0] > now:
+            _names.move_to_end(key)
+            return entry[1]
+
+    names = _load(model, user_id)
+    with _lock:
+        _names[key] = (now + settings.AUTOCOMPLETE_CACHE_TIMEOUT, names)
+        _names.move_to_end(key)
+        while len(_names) > settings.AUTOCOMPLETE_CACHE_USERS:
+            _names.popitem(last=False)
+    return names
+
+
+def invalidate(model, user_id):
+    """Drops the cached names of a user in this process after they change."""
+    with _lock:
+        _names.pop(_cache_key(model, user_id), None)
+
+
+def complete(model, user_id, prefix, limit):
+    """
+    Returns a user's tags or ingredients whose name starts with a prefix.
+
+    Explanation:
+    Each process keeps a bounded, least recently used cache of every user's names
+    sorted case-insensitively, so a lookup is a binary search followed by a short scan.
+    Entries expire after AUTOCOMPLETE_CACHE_TIMEOUT seconds, which bounds how stale
+    another process's changes can appear. Users with more than
+    AUTOCOMPLETE_MAX_CACHED_NAMES names are answered by the (user, UPPER(name))
+    text_pattern_ops index instead.
+
+    Args:
+        model: Either Tag or Ingredient.
+        user_id (int): The owner of the names.
+        prefix (str): The text typed so far, matched case-insensitively.
+        limit (int): The maximum number of matches to return.
+
+    Returns:
+        list: (id, name) pairs in case-insensitive name order.
+    """
+
+    names = _get(model, user_id)
+    key = prefix.upper()
+    if names is TOO_MANY_NAMES:
+        rows = (
+            model.objects.filter(user_id=user_id, name__istartswith=prefix)
+            .order_by(Upper("name"), "id")
+            .values_list("id", "name")
+        )
+        return list(rows[:limit])
+
+    matches = []
+    for upper, pk, name in names[bisect_left(names, (key,)) :]:
+        if not upper.startswith(key) or len(matches) == limit:
+            break
+        matches.append((pk, name))
+    return matches
@@ -0,0 +1,58 @@
+import csv
+import json
+
+from rest_framework import serializers
+
+EXPORT_FIELDS = ("pk", "wellbeing", "mental_stress", "physical_stress", "date_added")
+
+
+class Echo:
+    """A file-like object that hands each written line straight back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def _rows(values):
+    # Reuse the DRF field so exported timestamps match the journal API output.
+    date_field = serializers.DateTimeField()
+    for pk, wellbeing, mental_stress, physical_stress, date_added in values:
+        yield (
+            pk,
+            wellbeing,
+            mental_stress,
+            physical_stress,
+            date_field.to_representation(date_added),
+        )
+
+
+def csv_lines(values):
+    """
+    Encodes energy rows as CSV lines, starting with a header.
+
+    Args:
+        values: An iterable of tuples ordered like EXPORT_FIELDS.
+
+    Returns:
+        generator: The CSV lines, produced one row at a time.
+    """
+
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in _rows(values):
+        yield writer.writerow(row)
+
+
+def ndjson_lines(values):
+    """
+    Encodes energy rows as newline-delimited JSON objects.
+
+    Args:
+        values: An iterable of tuples ordered like EXPORT_FIELDS.
+
+    Returns:
+        generator: One JSON document per line, produced one row at a time.
+    """
+
+    for row in _rows(values):
+        yield json.dumps(dict(zip(EXPORT_FIELDS, row))) + "\n"
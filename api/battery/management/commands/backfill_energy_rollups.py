@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from battery import rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the daily and weekly energy rollups from the raw journal."
+
+    def handle(self, *args, **options):
+        """
+        A management command to recompute every energy rollup row.
+
+        Args:
+            self: The command instance.
+
+        Returns:
+            None
+
+        Examples:
+            Run once after deploying the rollup tables, or to repair them after entries
+            were changed with queryset updates that bypass the model signals.
+        """
+        self.stdout.write("Rebuilding energy rollups...")
+        written = rollups.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} rollup rows."))
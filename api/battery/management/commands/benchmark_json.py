@@ -0,0 +1,86 @@
+import time
+from io import BytesIO
+
+from django.core.management.base import BaseCommand
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from battery import parsers, renderers
+from battery.parsers import FastJSONParser
+from battery.renderers import FastJSONRenderer
+
+
+class Command(BaseCommand):
+    help = "Compares the stdlib and orjson backed JSON renderers and parsers."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=5000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        """
+        A management command timing JSON encoding and decoding of list payloads.
+
+        Args:
+            self: The command instance.
+
+        Returns:
+            None
+
+        Examples:
+            Renders and parses --rows journal entries and recipes shaped like the API
+            output, reporting the best of --repeat runs for each implementation.
+        """
+        if renderers.orjson is None or parsers.orjson is None:
+            self.stdout.write(self.style.WARNING("orjson is not installed."))
+            return
+
+        rows, repeat = options["rows"], options["repeat"]
+        payloads = {
+            "energy": [
+                {
+                    "pk": i,
+                    "wellbeing": 7,
+                    "mental_stress": 4,
+                    "physical_stress": 3,
+                    "date_added": "2024-05-01T08:30:15.123456Z",
+                }
+                for i in range(rows)
+            ],
+            "recipe": [
+                {
+                    "id": i,
+                    "title": f"Recipe {i}",
+                    "time_minutes": 25,
+                    "link": "https://example.com/recipe",
+                    "tags": [{"id": i, "name": "Dinner"}],
+                    "ingredients": [{"id": j, "name": f"Ingredient {j}"} for j in range(5)],
+                }
+                for i in range(rows)
+            ],
+        }
+        for name, payload in payloads.items():
+            body = JSONRenderer().render(payload)
+            timings = {
+                "render": (
+                    self.best(repeat, lambda p=payload: JSONRenderer().render(p)),
+                    self.best(repeat, lambda p=payload: FastJSONRenderer().render(p)),
+                ),
+                "parse": (
+                    self.best(repeat, lambda b=body: JSONParser().parse(BytesIO(b))),
+                    self.best(repeat, lambda b=body: FastJSONParser().parse(BytesIO(b))),
+                ),
+            }
+            for step, (stdlib, fast) in timings.items():
+                self.stdout.write(
+                    f"{name} {step}: stdlib {stdlib / rows * 1e6:.2f}us/row, "
+                    f"orjson {fast / rows * 1e6:.2f}us/row, {stdlib / fast:.1f}x faster"
+                )
+
+    def best(self, repeat, run):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
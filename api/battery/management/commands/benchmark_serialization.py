@@ -0,0 +1,96 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Prefetch
+
+from battery.fastpath import RowRenderer
+from battery.models import Energy, Ingredient, Recipe, Tag
+from battery.serializers import EnergySerializer
+from recipe.serializers import RecipeSerializer, TagSerializer
+
+
+class Command(BaseCommand):
+    help = "Compares list serialization through DRF serializers and the .values() fast path."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=2000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        """
+        A management command timing both list serialization paths per row.
+
+        Args:
+            self: The command instance.
+
+        Returns:
+            None
+
+        Examples:
+            Seeds a throwaway user with --rows journal entries, recipes and tags inside a
+            transaction that is rolled back afterwards, then reports the best of --repeat
+            runs of each path, including the queries it issues.
+        """
+        rows, repeat = options["rows"], options["repeat"]
+        with transaction.atomic():
+            user = self.seed(rows)
+            recipes = Recipe.objects.filter(user=user).prefetch_related(
+                Prefetch("tags", queryset=Tag.objects.order_by("id")),
+                Prefetch("ingredients", queryset=Ingredient.objects.order_by("id")),
+            )
+            cases = [
+                ("energy", EnergySerializer, Energy.objects.filter(user=user)),
+                ("recipe", RecipeSerializer, recipes),
+                ("tag", TagSerializer, Tag.objects.filter(user=user)),
+            ]
+            for name, serializer_class, queryset in cases:
+                slow = self.best(
+                    repeat,
+                    lambda cls=serializer_class, qs=queryset: cls(qs.all(), many=True).data,
+                )
+                renderer = RowRenderer(serializer_class())
+                fast = self.best(
+                    repeat,
+                    lambda r=renderer, qs=queryset: r.render(r.values(qs.all())),
+                )
+                self.stdout.write(
+                    f"{name}: serializer {slow / rows * 1e6:.1f}us/row, "
+                    f"fast path {fast / rows * 1e6:.1f}us/row, {slow / fast:.1f}x faster"
+                )
+            transaction.set_rollback(True)
+
+    def seed(self, rows):
+        user = get_user_model().objects.create_user(
+            email="benchmark@example.com", password="benchmark"
+        )
+        Energy.objects.bulk_create(
+            Energy(user=user, wellbeing=5, mental_stress=5, physical_stress=5)
+            for _ in range(rows)
+        )
+        tags = Tag.objects.bulk_create(Tag(user=user, name=f"Tag {i}") for i in range(rows))
+        ingredients = Ingredient.objects.bulk_create(
+            Ingredient(user=user, name=f"Ingredient {i}") for i in range(rows)
+        )
+        recipes = Recipe.objects.bulk_create(
+            Recipe(user=user, title=f"Recipe {i}", time_minutes=10) for i in range(rows)
+        )
+        Recipe.tags.through.objects.bulk_create(
+            Recipe.tags.through(recipe=recipe, tag=tag)
+            for recipe, tag in zip(recipes, tags)
+        )
+        Recipe.ingredients.through.objects.bulk_create(
+            Recipe.ingredients.through(recipe=recipe, ingredient=ingredient)
+            for i, recipe in enumerate(recipes)
+            for ingredient in ingredients[i : i + 3]
+        )
+        return user
+
+    def best(self, repeat, run):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
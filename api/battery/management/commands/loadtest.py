@@ -0,0 +1,81 @@
+import threading
+import time
+from http.client import HTTPConnection
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Measures requests per second and latency of a running server."
+
+    def add_arguments(self, parser):
+        parser.add_argument("url")
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument("--duration", type=float, default=10)
+        parser.add_argument("--token", help="API token sent as 'Token <token>'.")
+
+    def handle(self, *args, **options):
+        """
+        A management command issuing GET requests from keep-alive connections.
+
+        Args:
+            self: The command instance.
+
+        Returns:
+            None
+
+        Examples:
+            Start the server with different GUNICORN_WORKERS values and run
+            `manage.py loadtest http://localhost:8000/api/recipe/tags/ --token <key>`
+            against each to compare throughput as workers are added.
+        """
+        url = urlsplit(options["url"])
+        path = url.path + (f"?{url.query}" if url.query else "")
+        headers = {}
+        if options["token"]:
+            headers["Authorization"] = f"Token {options['token']}"
+
+        deadline = time.monotonic() + options["duration"]
+        latencies, errors = [], []
+        lock = threading.Lock()
+
+        def run():
+            connection = HTTPConnection(url.hostname, url.port or 80, timeout=30)
+            local, failed = [], 0
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                try:
+                    connection.request("GET", path, headers=headers)
+                    response = connection.getresponse()
+                    response.read()
+                    if response.status >= 400:
+                        failed += 1
+                except OSError:
+                    failed += 1
+                    connection.close()
+                    continue
+                local.append(time.perf_counter() - start)
+            connection.close()
+            with lock:
+                latencies.extend(local)
+                errors.append(failed)
+
+        workers = [threading.Thread(target=run) for _ in range(options["concurrency"])]
+        started = time.monotonic()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.monotonic() - started
+
+        latencies.sort()
+        if not latencies:
+            self.stdout.write(self.style.ERROR("No request completed."))
+            return
+        self.stdout.write(
+            f"{len(latencies) / elapsed:.1f} requests/sec, "
+            f"p50 {latencies[len(latencies) // 2] * 1000:.1f}ms, "
+            f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f}ms, "
+            f"{sum(errors)} errors"
+        )
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from battery import sync
+
+
+class Command(BaseCommand):
+    help = "Deletes sync tombstones older than the retention period."
+
+    def handle(self, *args, **options):
+        """
+        A management command to drop tombstones no client can still need.
+
+        Args:
+            self: The command instance.
+
+        Returns:
+            None
+
+        Examples:
+            Run daily. Clients whose cursor is older than SYNC_TOMBSTONE_RETENTION_DAYS
+            are sent their whole collection again, so they never miss a deletion.
+        """
+        deleted = sync.prune_tombstones()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} tombstones."))
@@ -1,12 +1,34 @@
-from django.core.management.base import BaseCommand
+import random
+import time
 
-from psycopg2 import OperationalError as Psycopg2Error
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
 from django.db.utils import OperationalError
-import time
+from psycopg2 import OperationalError as Psycopg2Error
 
 
 class Command(BaseCommand):
-    
+    help = "Waits for the database, then optionally applies pending migrations."
+    requires_system_checks = []
+
+    initial_delay = 0.05
+    max_delay = 1.0
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=30,
+            help="Seconds to wait for the database before giving up.",
+        )
+        parser.add_argument(
+            "--migrate",
+            action="store_true",
+            help="Apply migrations once the database is up, if any are pending.",
+        )
+
     def handle(self, *args, **options):
         """
         A management command to wait for the database to become available.
@@ -18,20 +40,62 @@ class Command(BaseCommand):
             None
 
         Raises:
-            Psycopg2Error: If there is an issue with the database connection to postgres.
-            OperationalError: If there is an issue with the database connection to django.
+            CommandError: If the database is still unavailable after --timeout seconds.
 
         Examples:
             This command is typically used to delay execution until the database is ready.
+            Retries start after 50ms and back off exponentially with jitter up to one
+            second, so a database that comes up quickly is noticed quickly. With
+            --migrate, `migrate` only runs when the migration plan is not empty.
         """
         self.stdout.write("Checking database connection...")
-        db_up = False
-        while not db_up:
+        started = time.monotonic()
+        deadline = started + options["timeout"]
+        delay = self.initial_delay
+        while True:
             try:
                 self.check(databases=["default"])
-                db_up = True
+                break
             except (Psycopg2Error, OperationalError) as e:
-                self.stdout.write(f"Database unavailable due to {e}, waiting 1 second...")
-                time.sleep(1)
+                e = str(e).strip()
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise CommandError(
+                        f"Database unavailable after {options['timeout']:g} seconds: {e}"
+                    )
+                wait = min(delay / 2 + random.uniform(0, delay / 2), remaining)
+                self.stdout.write(
+                    f"Database unavailable due to {e}, waiting {wait:.2f} seconds..."
+                )
+                time.sleep(wait)
+                delay = min(delay * 2, self.max_delay)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Database available in {time.monotonic() - started:.2f} seconds!"
+            )
+        )
+        if not options["migrate"]:
+            return
+
+        pending = self.pending_migrations()
+        if not pending:
+            self.stdout.write("No migrations to apply.")
+        else:
+            self.stdout.write(f"Applying {len(pending)} pending migrations...")
+            call_command(
+                "migrate", interactive=False, verbosity=options["verbosity"], stdout=self.stdout
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f"Ready in {time.monotonic() - started:.2f} seconds!")
+        )
+
+    def check(self, *args, **kwargs):
+        """Runs the system checks, then opens a connection to the database."""
+        super().check(*args, **kwargs)
+        connections[DEFAULT_DB_ALIAS].ensure_connection()
 
-        self.stdout.write(self.style.SUCCESS("Database available!"))
+    def pending_migrations(self):
+        """Returns the migrations `migrate` would apply to the default database."""
+        executor = MigrationExecutor(connections[DEFAULT_DB_ALIAS])
+        return executor.migration_plan(executor.loader.graph.leaf_nodes())
@@ -0,0 +1,267 @@
+import hmac
+import threading
+import time
+from bisect import bisect_left
+from ipaddress import ip_address, ip_network
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpResponse
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class RequestMetrics:
+    """
+    Latency histograms and SQL and render totals per route, shared by all workers.
+
+    Explanation:
+    Each (route, method) pair keeps one count per bucket and running sums. Requests
+    are recorded in process under a lock, so gthread workers can record
+    concurrently, and the deltas are added to the Django cache with incr at most once
+    per FLUSH_INTERVAL and before every scrape. A scrape therefore reports the totals
+    of every worker, and the totals keep growing when workers are recycled. Series
+    are registered in numbered slots claimed with cache.add, so every worker reads
+    the same list. Routes are URL pattern names, so the number of series is bounded
+    by the URLconf rather than by the paths clients request.
+
+    Attributes:
+        buckets (tuple): The upper bounds, in seconds, of the latency buckets.
+    """
+
+    FIELDS = ("count", "sum", "db_sum", "queries", "render_sum")
+    # Durations are stored as integer microseconds, since cache.incr only adds integers.
+    DURATIONS = ("sum", "db_sum", "render_sum")
+    FLUSH_INTERVAL = 1.0
+    PREFIX = "metrics"
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.series = {}
+        self.flushed = time.monotonic()
+
+    def observe(self, route, method, duration, db_duration, queries, render_duration):
+        """
+        Records one request.
+
+        Args:
+            route (str): The URL pattern name of the view that answered.
+            method (str): The HTTP method.
+            duration (float): The total time spent in the request, in seconds.
+            db_duration (float): The time spent executing SQL, in seconds.
+            queries (int): The number of SQL statements executed.
+            render_duration (float): The time spent rendering the response, in seconds.
+        """
+        with self.lock:
+            series = self.series.get((route, method))
+            if series is None:
+                series = self.series[(route, method)] = self._empty()
+            series["buckets"][bisect_left(self.buckets, duration)] += 1
+            series["count"] += 1
+            series["sum"] += duration
+            series["db_sum"] += db_duration
+            series["queries"] += queries
+            series["render_sum"] += render_duration
+            due = time.monotonic() - self.flushed >= self.FLUSH_INTERVAL
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Adds the requests recorded since the last flush to the shared totals."""
+        with self.lock:
+            pending, self.series = self.series, {}
+            self.flushed = time.monotonic()
+        if not pending:
+            return
+
+        slots = self._slots()
+        for key, value in pending.items():
+            slot = slots.index(key) if key in slots else self._register(key, slots)
+            amounts = dict(zip(self._bucket_fields(), value["buckets"]))
+            for field in self.FIELDS:
+                amounts[field] = value[field]
+                if field in self.DURATIONS:
+                    amounts[field] = round(value[field] * 1e6)
+            for field, amount in amounts.items():
+                if amount:
+                    self._incr(f"{self.PREFIX}:{slot}:{field}", amount)
+
+    def snapshot(self):
+        """
+        Reads the shared totals.
+
+        Returns:
+            dict: The bucket counts and sums per (route, method).
+        """
+        slots = self._slots()
+        fields = self._bucket_fields() + self.FIELDS
+        stored = cache.get_many(
+            [f"{self.PREFIX}:{slot}:{field}" for slot in range(len(slots)) for field in fields]
+        )
+        series = {}
+        for slot, key in enumerate(slots):
+            value = self._empty()
+            for i, field in enumerate(self._bucket_fields()):
+                value["buckets"][i] = stored.get(f"{self.PREFIX}:{slot}:{field}", 0)
+            for field in self.FIELDS:
+                value[field] = stored.get(f"{self.PREFIX}:{slot}:{field}", 0)
+                if field in self.DURATIONS:
+                    value[field] /= 1e6
+            series[key] = value
+        return series
+
+    def reset(self):
+        """Forgets every recorded request, in this process and in the cache."""
+        slots = self._slots()
+        with self.lock:
+            self.series.clear()
+        fields = self._bucket_fields() + self.FIELDS
+        cache.delete_many(
+            [f"{self.PREFIX}:series:{slot}" for slot in range(len(slots))]
+            + [f"{self.PREFIX}:{slot}:{field}" for slot in range(len(slots)) for field in fields]
+        )
+
+    def render(self):
+        """
+        Formats the shared series in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics document.
+        """
+        self.flush()
+        series = sorted(self.snapshot().items())
+
+        lines = [
+            "# HELP http_request_duration_seconds Time spent answering requests.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (route, method), value in series:
+            labels = f'route="{route}",method="{method}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), value["buckets"]):
+                cumulative += count
+                lines.append(
+                    f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}'
+                )
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {value['sum']}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {value['count']}")
+
+        for name, key, kind, description in (
+            ("http_request_db_seconds_total", "db_sum", "counter", "Time spent executing SQL."),
+            ("http_request_db_queries_total", "queries", "counter", "SQL statements executed."),
+            (
+                "http_request_render_seconds_total",
+                "render_sum",
+                "counter",
+                "Time spent rendering responses.",
+            ),
+        ):
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+            for (route, method), value in series:
+                lines.append(f'{name}{{route="{route}",method="{method}"}} {value[key]}')
+        return "\n".join(lines) + "\n"
+
+    def _empty(self):
+        return {
+            "buckets": [0] * (len(self.buckets) + 1),
+            "count": 0,
+            "sum": 0.0,
+            "db_sum": 0.0,
+            "queries": 0,
+            "render_sum": 0.0,
+        }
+
+    def _bucket_fields(self):
+        return tuple(f"bucket{i}" for i in range(len(self.buckets) + 1))
+
+    def _slots(self):
+        # Slots are claimed in order, so the list ends at the first free one.
+        slots = []
+        while True:
+            key = cache.get(f"{self.PREFIX}:series:{len(slots)}")
+            if key is None:
+                return slots
+            slots.append(tuple(key))
+
+    def _register(self, key, slots):
+        # cache.add only succeeds for one worker, so a slot never holds two series.
+        while True:
+            slot = len(slots)
+            if cache.add(f"{self.PREFIX}:series:{slot}", list(key), None):
+                slots.append(key)
+                return slot
+            stored = cache.get(f"{self.PREFIX}:series:{slot}")
+            if stored is None:
+                continue
+            slots.append(tuple(stored))
+            if slots[-1] == key:
+                return slot
+
+    def _incr(self, key, amount):
+        try:
+            cache.incr(key, amount)
+        except ValueError:
+            if not cache.add(key, amount, None):
+                cache.incr(key, amount)
+
+
+registry = RequestMetrics()
+
+
+def allowed(request):
+    """
+    Checks whether a client may read the metrics.
+
+    Explanation:
+    The client address is REMOTE_ADDR, the peer gunicorn sees, so forwarded headers
+    cannot be used to pass the check. A client outside METRICS_ALLOWED_IPS is let in
+    only with a bearer token matching METRICS_TOKEN.
+
+    Args:
+        request: The HTTP request.
+
+    Returns:
+        bool: Whether the client is allowed.
+    """
+    try:
+        address = ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        address = None
+    if address is not None and any(
+        address in ip_network(network, strict=False)
+        for network in settings.METRICS_ALLOWED_IPS
+    ):
+        return True
+
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    return bool(settings.METRICS_TOKEN) and (
+        scheme.lower() == "bearer"
+        and hmac.compare_digest(token.encode(), settings.METRICS_TOKEN.encode())
+    )
+
+
+def metrics(request):
+    """
+    Exposes the request metrics to a Prometheus scraper.
+
+    Args:
+        request: The HTTP request.
+
+    Returns:
+        HttpResponse: The metrics document.
+
+    Raises:
+        Http404: If METRICS_ENABLED is off.
+        PermissionDenied: If the client is neither in METRICS_ALLOWED_IPS nor sends
+        METRICS_TOKEN.
+    """
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    if not allowed(request):
+        raise PermissionDenied
+    return HttpResponse(
+        registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
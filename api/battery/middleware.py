@@ -0,0 +1,88 @@
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+from battery.metrics import registry
+
+
+class TimingMiddleware:
+    """
+    Times each request and reports where the time went.
+
+    Explanation:
+    SQL is timed by wrapping the connection's cursor execution, and rendering by
+    marking the moment a template response is handed back for rendering and
+    registering a post render callback. Whatever remains of the total is the view
+    itself, including serialization. The breakdown is sent as a Server-Timing header
+    when SERVER_TIMING is on and recorded in the per route histograms exposed at
+    /metrics when METRICS_ENABLED is on. With both off the middleware removes
+    itself from the chain at startup.
+    """
+
+    def __init__(self, get_response):
+        if not (settings.SERVER_TIMING or settings.METRICS_ENABLED):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timing = request.timing = {"db": 0.0, "queries": 0, "render": 0.0}
+
+        def execute(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                timing["db"] += time.perf_counter() - start
+                timing["queries"] += 1
+
+        start = time.perf_counter()
+        with connection.execute_wrapper(execute):
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+        app = max(total - timing["db"] - timing["render"], 0)
+
+        if settings.SERVER_TIMING:
+            response["Server-Timing"] = ", ".join(
+                (
+                    f'db;dur={timing["db"] * 1000:.2f};desc="{timing["queries"]} queries"',
+                    f"app;dur={app * 1000:.2f}",
+                    f'render;dur={timing["render"] * 1000:.2f}',
+                    f"total;dur={total * 1000:.2f}",
+                )
+            )
+        if settings.METRICS_ENABLED:
+            registry.observe(
+                self.route(request),
+                request.method,
+                total,
+                timing["db"],
+                timing["queries"],
+                timing["render"],
+            )
+        return response
+
+    def process_template_response(self, request, response):
+        start = time.perf_counter()
+
+        def rendered(response):
+            request.timing["render"] = time.perf_counter() - start
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    def route(self, request):
+        """
+        Names the URL pattern that answered a request.
+
+        Args:
+            request: The HTTP request.
+
+        Returns:
+            str: The pattern name, the view name for unnamed patterns, or "unmatched".
+        """
+        match = request.resolver_match
+        if match is None:
+            return "unmatched"
+        return match.url_name or getattr(match.func, "view_class", match.func).__name__
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('battery', '0006_recipe_ingredients'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='energy',
+            index=models.Index(fields=['date_added', 'id'], name='energy_date_added_id_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+from django.db import migrations
+from django.utils.crypto import get_random_string
+
+PLACEHOLDER_EMAIL = 'unclaimed-energy@localhost'
+
+
+def assign_energy_owner(apps, schema_editor):
+    """
+    Assigns energy entries recorded before ownership existed to a single user.
+
+    Explanation:
+    Entries are given to the oldest superuser, falling back to the oldest user. When
+    the database holds no users at all they are given to an inactive placeholder
+    account with an unusable password, so no journal data is lost; an operator can
+    reassign them to a real account later.
+    """
+    User = apps.get_model("battery", "User")
+    Energy = apps.get_model("battery", "Energy")
+
+    orphans = Energy.objects.filter(user__isnull=True)
+    if not orphans.exists():
+        return
+    owner = (
+        User.objects.filter(is_superuser=True).order_by("id").first()
+        or User.objects.order_by("id").first()
+    )
+    if owner is None:
+        # "!" marks an unusable password, as set_unusable_password would.
+        owner = User.objects.create(
+            email=PLACEHOLDER_EMAIL,
+            name="Unclaimed energy entries",
+            password="!" + get_random_string(40),
+            is_active=False,
+        )
+    orphans.update(user=owner)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('battery', '0008_energy_user'),
+    ]
+
+    operations = [
+        migrations.RunPython(assign_energy_owner, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+SYNCED_TABLES = ("battery_energy", "battery_recipe", "battery_tombstone")
+
+# Stamps every inserted or updated row with the id of the transaction writing it, so the
+# sync feed can tell which rows a reader may not have seen yet, whatever the clocks say.
+CREATE_TRIGGERS = """
+CREATE FUNCTION battery_set_change_xid() RETURNS trigger AS $$
+BEGIN
+    NEW.change_xid := txid_current();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+""" + "".join(
+    f"""
+CREATE TRIGGER {table}_change_xid BEFORE INSERT OR UPDATE ON {table}
+FOR EACH ROW EXECUTE FUNCTION battery_set_change_xid();
+"""
+    for table in SYNCED_TABLES
+)
+
+DROP_TRIGGERS = "".join(
+    f"DROP TRIGGER {table}_change_xid ON {table};\n" for table in SYNCED_TABLES
+) + "DROP FUNCTION battery_set_change_xid();"
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('battery', '0011_energyrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(choices=[('energy', 'Energy'), ('recipe', 'Recipe')], max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+                ('change_xid', models.BigIntegerField(default=0, editable=False)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [
+                    models.Index(fields=['user', 'model', 'change_xid'], name='tombstone_user_change_idx'),
+                    models.Index(fields=['deleted_at'], name='tombstone_deleted_at_idx'),
+                ],
+            },
+        ),
+        migrations.AddField(
+            model_name='energy',
+            name='change_xid',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='change_xid',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='energy',
+            index=models.Index(fields=['user', 'change_xid'], name='energy_user_change_xid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['user', 'change_xid'], name='recipe_user_change_xid_idx'),
+        ),
+        migrations.RunSQL(CREATE_TRIGGERS, DROP_TRIGGERS),
+    ]
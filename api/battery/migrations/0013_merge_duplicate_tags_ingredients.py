@@ -0,0 +1,54 @@
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicates(apps, schema_editor):
+    """
+    Merges tags and ingredients that share a name for the same user.
+
+    Explanation:
+    The row with the lowest id is kept. Recipes linked to a duplicate are linked to the
+    kept row instead, after which the duplicates are deleted.
+    """
+    Recipe = apps.get_model("battery", "Recipe")
+
+    for model_name, relation in (("Tag", "tags"), ("Ingredient", "ingredients")):
+        model = apps.get_model("battery", model_name)
+        through = Recipe._meta.get_field(relation).remote_field.through
+        column = f"{model_name.lower()}_id"
+
+        duplicates = (
+            model.objects.values("user_id", "name")
+            .annotate(keep=Min("id"), total=Count("id"))
+            .filter(total__gt=1)
+        )
+        for duplicate in duplicates:
+            others = model.objects.filter(
+                user_id=duplicate["user_id"], name=duplicate["name"]
+            ).exclude(id=duplicate["keep"])
+            linked = set(
+                through.objects.filter(**{column: duplicate["keep"]}).values_list(
+                    "recipe_id", flat=True
+                )
+            )
+            relinked = set(
+                through.objects.filter(**{f"{column}__in": others}).values_list(
+                    "recipe_id", flat=True
+                )
+            )
+            through.objects.bulk_create(
+                through(recipe_id=recipe_id, **{column: duplicate["keep"]})
+                for recipe_id in relinked - linked
+            )
+            others.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('battery', '0012_sync_change_xid_tombstone'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:38
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.operations import TrigramExtension
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def populate_search_vectors(apps, schema_editor):
+    """
+    Fills in the search vector of existing recipes.
+
+    Explanation:
+    The expression is a copy of battery.search.search_vector as it stood when this
+    migration was written, so later changes to the app code cannot alter it.
+    """
+    Recipe = apps.get_model("battery", "Recipe")
+    Tag = apps.get_model("battery", "Tag")
+    Ingredient = apps.get_model("battery", "Ingredient")
+
+    def names(model):
+        return Subquery(
+            model.objects.filter(recipe=OuterRef("pk"))
+            .order_by()
+            .values("recipe")
+            .annotate(names=StringAgg("name", delimiter=" "))
+            .values("names")
+        )
+
+    Recipe.objects.update(
+        search_vector=SearchVector("title", weight="A", config="english")
+        + SearchVector("description", weight="B", config="english")
+        + SearchVector(names(Tag), weight="C", config="english")
+        + SearchVector(names(Ingredient), weight="C", config="english")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('battery', '0014_unique_tag_ingredient_name'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='recipe_search_vector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['title'], name='recipe_title_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.RunPython(populate_search_vectors, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,7 @@
 from django.db import models
+from django.db.models.functions import Upper
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.contrib.auth.models import (
     BaseUserManager,
@@ -71,6 +74,8 @@ class User(AbstractBaseUser, PermissionsMixin):
     name = models.CharField(max_length=100)
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
+    # Signed into access tokens and bumped to invalidate all of them, e.g. on a password change.
+    token_version = models.PositiveIntegerField(default=0)
     USERNAME_FIELD = "email"
     objects = UserManager()
 
@@ -86,6 +91,7 @@ class Energy(models.Model):
         None
     """
 
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     wellbeing = models.IntegerField(
         validators=[MinValueValidator(1), MaxValueValidator(10)],
         help_text="Enter a value from 1 (very unwell) to 10 (extremely well)",
@@ -99,7 +105,62 @@ class Energy(models.Model):
         help_text="Enter a value from 1 (no stress) to 10 (extremely stressed)",
     )
     date_added = models.DateTimeField(auto_now_add=True)
+    # Id of the last transaction that wrote the row, set by a database trigger.
+    change_xid = models.BigIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "-date_added", "-id"], name="energy_user_date_added_idx"
+            ),
+            models.Index(fields=["user", "change_xid"], name="energy_user_change_xid_idx"),
+        ]
+
+
+
+class EnergyRollup(models.Model):
+    """
+    Model to store running totals of energy entries for one user per day or week.
+
+    Explanation:
+    Rows are maintained incrementally as Energy entries are created, updated and deleted,
+    so charting averages reads one row per bucket instead of every raw entry.
+
+    Returns:
+        None
+    """
 
+    DAY = "day"
+    WEEK = "week"
+    BUCKET_CHOICES = [(DAY, "Day"), (WEEK, "Week")]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    bucket = models.CharField(max_length=4, choices=BUCKET_CHOICES)
+    period_start = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+    wellbeing_sum = models.PositiveIntegerField(default=0)
+    mental_stress_sum = models.PositiveIntegerField(default=0)
+    physical_stress_sum = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "bucket", "period_start"],
+                name="energy_rollup_unique_period",
+            ),
+        ]
+
+    @property
+    def wellbeing(self):
+        return round(self.wellbeing_sum / self.count, 2)
+
+    @property
+    def mental_stress(self):
+        return round(self.mental_stress_sum / self.count, 2)
+
+    @property
+    def physical_stress(self):
+        return round(self.physical_stress_sum / self.count, 2)
 
 class Recipe(models.Model):
     """
@@ -116,6 +177,19 @@ class Recipe(models.Model):
     link = models.CharField(max_length=255, blank=True)
     tags = models.ManyToManyField("Tag")
     ingredients = models.ManyToManyField("Ingredient")
+    # Id of the last transaction that wrote the row, set by a database trigger.
+    change_xid = models.BigIntegerField(default=0, editable=False)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "change_xid"], name="recipe_user_change_xid_idx"),
+            GinIndex(fields=["search_vector"], name="recipe_search_vector_idx"),
+            GinIndex(
+                fields=["title"], name="recipe_title_trgm_idx", opclasses=["gin_trgm_ops"]
+            ),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -130,6 +204,20 @@ class Tag(models.Model):
     name = models.CharField(max_length=100)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "name"], name="unique_tag_name_per_user"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                "user",
+                OpClass(Upper("name"), name="text_pattern_ops"),
+                name="tag_name_prefix_idx",
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -144,5 +232,65 @@ class Ingredient(models.Model):
     name = models.CharField(max_length=100)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "name"], name="unique_ingredient_name_per_user"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                "user",
+                OpClass(Upper("name"), name="text_pattern_ops"),
+                name="ingredient_name_prefix_idx",
+            ),
+        ]
+
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
+
+
+class Tombstone(models.Model):
+    """
+    Model to record the deletion of a synced object so clients can drop their copy.
+
+    Returns:
+        None
+    """
+
+    ENERGY = "energy"
+    RECIPE = "recipe"
+    MODEL_CHOICES = [(ENERGY, "Energy"), (RECIPE, "Recipe")]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    model = models.CharField(max_length=20, choices=MODEL_CHOICES)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+    # Id of the last transaction that wrote the row, set by a database trigger.
+    change_xid = models.BigIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "model", "change_xid"], name="tombstone_user_change_idx"
+            ),
+            models.Index(fields=["deleted_at"], name="tombstone_deleted_at_idx"),
+        ]
+
+
+class RefreshToken(models.Model):
+    """
+    Model to store a long-lived refresh token that is exchanged for signed access tokens.
+
+    Explanation:
+    Only the SHA-256 hash of the token is stored. A token is single use: refreshing
+    deletes it and issues a new one.
+
+    Returns:
+        None
+    """
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    key_hash = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
@@ -0,0 +1,147 @@
+import logging
+import os
+import re
+import sys
+from collections import defaultdict
+
+import django
+import rest_framework
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from rest_framework.serializers import Serializer
+
+logger = logging.getLogger(__name__)
+
+IN_LIST = re.compile(r"IN \((?:%s, )*%s\)")
+IGNORED_FILES = (
+    os.path.dirname(django.__file__) + os.sep,
+    os.path.dirname(rest_framework.__file__) + os.sep,
+    __file__,
+    os.path.join(os.path.dirname(__file__), "middleware.py"),
+)
+
+
+class NPlusOneError(AssertionError):
+    """Raised when a request repeats a query shape and NPLUSONE_RAISE is on."""
+
+
+def shape(sql):
+    """
+    Reduces a statement to its shape.
+
+    Args:
+        sql (str): The SQL with %s placeholders, as passed to the cursor.
+
+    Returns:
+        str: The statement with IN lists of any length collapsed, so statements
+        differing only in their parameters share a shape.
+    """
+    return IN_LIST.sub("IN (...)", sql)
+
+
+def origin():
+    """
+    Finds where the query being executed comes from.
+
+    Returns:
+        str: The serializer field being rendered, if any, and the innermost line of
+        project code on the stack.
+    """
+    field, line = None, None
+    frame = sys._getframe(2)
+    while frame is not None and (field is None or line is None):
+        code = frame.f_code
+        if (
+            field is None
+            and code.co_name == "to_representation"
+            and isinstance(frame.f_locals.get("self"), Serializer)
+            and "field" in frame.f_locals
+        ):
+            field = f"{type(frame.f_locals['self']).__name__}.{frame.f_locals['field'].field_name}"
+        if line is None and not code.co_filename.startswith(IGNORED_FILES):
+            line = f"{os.path.relpath(code.co_filename, settings.BASE_DIR)}:{frame.f_lineno}"
+        frame = frame.f_back
+    return " at ".join(part for part in (field, line) if part)
+
+
+class QueryShapeTracker:
+    """
+    Counts the queries executed per shape and remembers where each shape came from.
+
+    Explanation:
+    Installed as a connection execute wrapper. An N+1 pattern shows up as the same
+    SELECT shape executed once per parent row, so any shape seen at least threshold
+    times is reported with the origin of its first execution. Writes are not counted:
+    repeating them is often deliberate, such as the rollup UPDATE issued per touched
+    day and week, or bulk_create batches.
+
+    Attributes:
+        threshold (int): The number of executions of one shape that is reported.
+        counts (dict): The number of executions per shape.
+        origins (dict): The origin of the first execution per shape.
+    """
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.counts = defaultdict(int)
+        self.origins = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql.lstrip()[:6].upper() != "SELECT":
+            return execute(sql, params, many, context)
+        key = shape(sql)
+        self.counts[key] += 1
+        if key not in self.origins:
+            self.origins[key] = origin()
+        return execute(sql, params, many, context)
+
+    def repeated(self):
+        """
+        Lists the shapes executed at least threshold times.
+
+        Returns:
+            list: (shape, count, origin) tuples, most repeated first.
+        """
+        return sorted(
+            (
+                (key, count, self.origins[key])
+                for key, count in self.counts.items()
+                if count >= self.threshold
+            ),
+            key=lambda item: -item[1],
+        )
+
+
+class NPlusOneMiddleware:
+    """
+    Reports requests that execute the same query shape repeatedly.
+
+    Explanation:
+    Enabled by NPLUSONE_DETECTION, which follows DEBUG and is switched on by the test
+    runner. Each repeated shape is logged as a warning naming the serializer field or
+    line it came from. With NPLUSONE_RAISE on, the request fails with NPlusOneError
+    instead, which fails the test that made it.
+    """
+
+    def __init__(self, get_response):
+        if not settings.NPLUSONE_DETECTION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        tracker = QueryShapeTracker(settings.NPLUSONE_THRESHOLD)
+        with connection.execute_wrapper(tracker):
+            response = self.get_response(request)
+
+        repeated = tracker.repeated()
+        if repeated:
+            report = "\n".join(
+                f"{count} x {key}\n    from {source or 'unknown'}"
+                for key, count, source in repeated
+            )
+            message = f"Repeated queries in {request.method} {request.path}:\n{report}"
+            if settings.NPLUSONE_RAISE:
+                raise NPlusOneError(message)
+            logger.warning(message)
+        return response
@@ -0,0 +1,162 @@
+from base64 import b64decode, b64encode
+from collections import namedtuple
+from datetime import datetime
+from urllib import parse
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+Cursor = namedtuple("Cursor", ["date_added", "pk", "reverse"])
+
+
+class EnergyKeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over Energy entries ordered by (date_added, id).
+
+    Explanation:
+    Each page is fetched with a range predicate on the composite ordering key
+    rather than an OFFSET, so every page costs the same regardless of its depth.
+    No COUNT query is issued; the paginator reads one extra row to learn whether
+    another page follows. Cursors are opaque base64 tokens encoding the boundary
+    row and the direction of travel.
+
+    Attributes:
+        cursor_query_param (str): The query parameter carrying the opaque cursor.
+        page_size_query_param (str): The query parameter used to request a page size.
+        page_size (int): The default number of entries per page.
+        max_page_size (int): The upper bound for a client requested page size.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    page_size = 50
+    max_page_size = 500
+    invalid_cursor_message = "Invalid cursor"
+
+    def is_requested(self, request):
+        """
+        Checks whether the client opted in to paginated results.
+
+        Args:
+            request: The incoming request.
+
+        Returns:
+            bool: True if a cursor or page size was supplied.
+        """
+
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        Returns one page of entries following the requested cursor.
+
+        Args:
+            queryset: The Energy queryset to paginate.
+            request: The incoming request.
+            view: The view being paginated, if any.
+
+        Returns:
+            list: The entries on the requested page in ascending order.
+
+        Raises:
+            NotFound: If the supplied cursor cannot be decoded.
+        """
+
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.cursor = self.decode_cursor(request)
+
+        reverse = self.cursor is not None and self.cursor.reverse
+        if reverse:
+            queryset = queryset.order_by("-date_added", "-id")
+        else:
+            queryset = queryset.order_by("date_added", "id")
+
+        if self.cursor is not None:
+            date_added, pk = self.cursor.date_added, self.cursor.pk
+            if reverse:
+                queryset = queryset.filter(
+                    Q(date_added__lt=date_added) | Q(date_added=date_added, id__lt=pk)
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(date_added__gt=date_added) | Q(date_added=date_added, id__gt=pk)
+                )
+
+        results = list(queryset[: self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[: self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(Cursor(*self.position(self.page[-1]), False))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(Cursor(*self.position(self.page[0]), True))
+
+    def position(self, entry):
+        """Return the (date_added, pk) key of an entry or of a .values() row."""
+        if isinstance(entry, dict):
+            return entry["date_added"], entry["pk"]
+        return entry.date_added, entry.pk
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            querystring = b64decode(encoded.encode("ascii")).decode("ascii")
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            return Cursor(
+                date_added=datetime.fromisoformat(tokens["d"][0]),
+                pk=int(tokens["i"][0]),
+                reverse=bool(int(tokens.get("r", ["0"])[0])),
+            )
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, cursor):
+        tokens = {"d": cursor.date_added.isoformat(), "i": cursor.pk}
+        if cursor.reverse:
+            tokens["r"] = "1"
+        querystring = parse.urlencode(tokens, doseq=True)
+        encoded = b64encode(querystring.encode("ascii")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
@@ -0,0 +1,131 @@
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Recipe
+
+
+def _cache_key(user_id, version):
+    return f"pantry-index:{user_id}:{version}"
+
+
+def _version_key(user_id):
+    return f"pantry-version:{user_id}"
+
+
+def _links(user_id):
+    return Recipe.ingredients.through.objects.filter(recipe__user_id=user_id)
+
+
+def _version(user_id):
+    # A lost counter restarts from the clock, never at a version an old index has.
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        cache.add(_version_key(user_id), time.time_ns(), None)
+        version = cache.get(_version_key(user_id))
+    return version
+
+
+def _bump(user_id):
+    try:
+        cache.incr(_version_key(user_id))
+    except ValueError:
+        cache.add(_version_key(user_id), time.time_ns(), None)
+
+
+def _build_index(user_id):
+    """
+    Reads every recipe to ingredient link of a user in one query.
+
+    Args:
+        user_id (int): The owner of the recipes.
+
+    Returns:
+        dict: "recipes" maps each recipe id to its ingredient ids and "inverted" maps each
+        ingredient id to the recipes that use it.
+    """
+
+    recipes = defaultdict(set)
+    inverted = defaultdict(set)
+    for recipe_id, ingredient_id in _links(user_id).values_list("recipe_id", "ingredient_id"):
+        recipes[recipe_id].add(ingredient_id)
+        inverted[ingredient_id].add(recipe_id)
+    return {
+        "recipes": {key: frozenset(value) for key, value in recipes.items()},
+        "inverted": {key: frozenset(value) for key, value in inverted.items()},
+    }
+
+
+def get_index(user_id):
+    """
+    Returns the cached pantry index of a user, building it on a miss.
+
+    Explanation:
+    Indexes are cached under a per-user version counter kept in the shared cache,
+    which the signals in battery.signals bump when the user's recipes change, so a
+    hit costs two cache reads and no query. The version is read before the links, so
+    an index is never stored under a version newer than its data.
+
+    Args:
+        user_id (int): The owner of the recipes.
+
+    Returns:
+        dict: The index built by _build_index.
+    """
+
+    version = _version(user_id)
+    index = cache.get(_cache_key(user_id, version))
+    if index is None:
+        index = _build_index(user_id)
+        cache.set(_cache_key(user_id, version), index, settings.PANTRY_INDEX_TIMEOUT)
+    return index
+
+
+def invalidate(user_id):
+    """
+    Retires the cached pantry index of a user after their recipes change.
+
+    Explanation:
+    The version is bumped at once, so the writing transaction sees its own change, and
+    again when it commits, so an index another worker built from the links read
+    before the commit is not served afterwards.
+
+    Args:
+        user_id (int): The owner of the recipes.
+    """
+    _bump(user_id)
+    transaction.on_commit(lambda: _bump(user_id))
+
+
+def rank(user_id, pantry):
+    """
+    Ranks a user's recipes by how much of each the pantry covers.
+
+    Explanation:
+    Candidate recipes are the union of the inverted index entries for the pantry, so
+    recipes sharing no ingredient with it are never considered. Each candidate is then
+    scored with one set difference against the pantry.
+
+    Args:
+        user_id (int): The owner of the recipes.
+        pantry: The ingredient ids the user has.
+
+    Returns:
+        list: (recipe id, missing ingredient ids) pairs, fully cookable recipes first,
+        then by fewest missing ingredients, then newest first.
+    """
+
+    index = get_index(user_id)
+    pantry = frozenset(pantry)
+    candidates = set()
+    for ingredient_id in pantry:
+        candidates |= index["inverted"].get(ingredient_id, frozenset())
+
+    ranked = [
+        (recipe_id, index["recipes"][recipe_id] - pantry) for recipe_id in candidates
+    ]
+    ranked.sort(key=lambda item: (len(item[1]), -item[0]))
+    return ranked
@@ -0,0 +1,97 @@
+import json
+from io import BytesIO
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONParser(JSONParser):
+    """
+    Parses JSON with orjson, falling back to the stdlib parser.
+
+    Explanation:
+    orjson only reads UTF-8 and, like the strict stdlib parser, rejects NaN and
+    Infinity. A body it cannot decode is parsed again with the stdlib json module, so
+    documents orjson refuses, such as integers beyond 64 bits, still parse and invalid
+    ones fail with the same ParseError message as before.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """
+        Parses the incoming bytestream as JSON and returns the resulting data.
+
+        Args:
+            stream: The request body stream.
+            media_type: The media type of the request body.
+            parser_context: Additional context supplied by the view.
+
+        Returns:
+            The decoded document.
+
+        Raises:
+            ParseError: If the body is not valid JSON.
+        """
+
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if orjson is None or not self.strict or encoding.lower().replace("-", "") != "utf8":
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return super().parse(BytesIO(body), media_type, parser_context)
+
+
+class NDJSONParser(BaseParser):
+    """
+    Parses newline-delimited JSON into a list of objects.
+
+    Explanation:
+    The request stream is consumed one line at a time, so a large upload never needs to
+    be held in memory as a single string before decoding. Blank lines are ignored.
+
+    Attributes:
+        media_type (str): The media type handled by this parser.
+    """
+
+    media_type = "application/x-ndjson"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """
+        Decodes each line of the stream as a JSON document.
+
+        Args:
+            stream: The request body stream.
+            media_type: The media type of the request body.
+            parser_context: Additional context supplied by the view.
+
+        Returns:
+            list: The decoded documents in the order they were received.
+
+        Raises:
+            ParseError: If a line is not valid JSON or not in the request encoding.
+        """
+
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        items = []
+        if stream is None:
+            return items
+
+        for line_number, line in enumerate(stream, start=1):
+            try:
+                line = line.decode(encoding).strip()
+                if not line:
+                    continue
+                items.append(json.loads(line))
+            except (UnicodeDecodeError, ValueError) as exc:
+                raise ParseError(f"NDJSON parse error on line {line_number} - {exc}")
+        return items
@@ -0,0 +1,57 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Renders JSON with orjson, falling back to the stdlib renderer.
+
+    Explanation:
+    Dates, times and any type orjson does not handle natively are passed to DRF's
+    JSONEncoder, so datetimes keep their trailing Z and Decimals their float form. The
+    \\u2028 and \\u2029 escapes are applied like the stdlib renderer. Pretty printing,
+    ASCII only output or non compact separators, and anything orjson refuses to encode,
+    are rendered by the stdlib renderer unchanged.
+
+    Attributes:
+        options (int): The orjson options used to encode.
+    """
+
+    options = (
+        orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+        | orjson.OPT_NON_STR_KEYS
+        if orjson
+        else 0
+    )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """
+        Render data into JSON, returning a bytestring.
+
+        Args:
+            data: The data to render.
+            accepted_media_type: The media type accepted by the client.
+            renderer_context: Additional context supplied by the view.
+
+        Returns:
+            bytes: The UTF-8 encoded JSON document.
+        """
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=self.options)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
@@ -0,0 +1,109 @@
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DateField, F, Sum
+from django.db.models.functions import TruncDate, TruncWeek
+from django.utils import timezone
+
+from .models import Energy, EnergyRollup
+
+SCORE_FIELDS = ("wellbeing", "mental_stress", "physical_stress")
+
+
+def period_starts(date_added):
+    """
+    Returns the day and week buckets an entry timestamp falls into.
+
+    Args:
+        date_added: The timestamp of the energy entry.
+
+    Returns:
+        list: (bucket, period_start) pairs, weeks starting on Monday.
+    """
+
+    day = timezone.localdate(date_added)
+    week = day - timedelta(days=day.weekday())
+    return [(EnergyRollup.DAY, day), (EnergyRollup.WEEK, week)]
+
+
+def apply_changes(added=(), removed=()):
+    """
+    Folds added and removed entries into their rollup rows.
+
+    Explanation:
+    Deltas are first summed per (user, bucket, period) so a batch of entries costs one
+    update per touched bucket rather than one per entry. An edited entry is passed as
+    both removed (its previous values) and added (its new values).
+
+    Args:
+        added: Energy instances to add to the rollups.
+        removed: Energy instances to remove from the rollups.
+    """
+
+    deltas = defaultdict(Counter)
+    for entries, sign in ((added, 1), (removed, -1)):
+        for entry in entries:
+            for bucket, period_start in period_starts(entry.date_added):
+                delta = deltas[(entry.user_id, bucket, period_start)]
+                delta["count"] += sign
+                for field in SCORE_FIELDS:
+                    delta[f"{field}_sum"] += sign * getattr(entry, field)
+
+    for key, delta in deltas.items():
+        if any(delta.values()):
+            _apply_delta(key, delta)
+
+
+def _apply_delta(key, delta):
+    user_id, bucket, period_start = key
+    rollups = EnergyRollup.objects.filter(
+        user_id=user_id, bucket=bucket, period_start=period_start
+    )
+    increments = {field: F(field) + value for field, value in delta.items()}
+
+    if rollups.update(**increments):
+        if delta["count"] < 0:
+            rollups.filter(count=0).delete()
+        return
+    if delta["count"] <= 0:
+        return
+
+    try:
+        with transaction.atomic():
+            EnergyRollup.objects.create(
+                user_id=user_id, bucket=bucket, period_start=period_start, **delta
+            )
+    except IntegrityError:
+        # Another writer created the row first, so fold the delta into theirs.
+        rollups.update(**increments)
+
+
+def rebuild():
+    """
+    Recomputes every rollup row from the raw energy entries.
+
+    Returns:
+        int: The number of rollup rows written.
+    """
+
+    truncations = {
+        EnergyRollup.DAY: TruncDate("date_added"),
+        EnergyRollup.WEEK: TruncWeek("date_added", output_field=DateField()),
+    }
+    sums = {f"{field}_sum": Sum(field) for field in SCORE_FIELDS}
+
+    with transaction.atomic():
+        EnergyRollup.objects.all().delete()
+        rollups = []
+        for bucket, truncation in truncations.items():
+            rows = (
+                Energy.objects.annotate(period_start=truncation)
+                .values("user_id", "period_start")
+                .annotate(count=Count("id"), **sums)
+                .order_by()
+            )
+            rollups.extend(EnergyRollup(bucket=bucket, **row) for row in rows)
+        EnergyRollup.objects.bulk_create(rollups, batch_size=1000)
+
+    return len(rollups)
@@ -0,0 +1,130 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    TrigramSimilarity,
+)
+from django.db.models import F, OuterRef, Subquery
+
+from .models import Ingredient, Recipe, Tag
+
+SEARCH_CONFIG = "english"
+
+# The recipe ids collected by the innermost deferred_refresh block, if any.
+_pending = ContextVar("search_pending", default=None)
+
+
+def _names(model):
+    """Returns a subquery joining the names of a recipe's tags or ingredients."""
+    return Subquery(
+        model.objects.filter(recipe=OuterRef("pk"))
+        .order_by()
+        .values("recipe")
+        .annotate(names=StringAgg("name", delimiter=" "))
+        .values("names")
+    )
+
+
+def search_vector():
+    """
+    Builds the weighted document a recipe is searched by.
+
+    Returns:
+        SearchVector: Title, then description, then tag and ingredient names.
+    """
+
+    return (
+        SearchVector("title", weight="A", config=SEARCH_CONFIG)
+        + SearchVector("description", weight="B", config=SEARCH_CONFIG)
+        + SearchVector(_names(Tag), weight="C", config=SEARCH_CONFIG)
+        + SearchVector(_names(Ingredient), weight="C", config=SEARCH_CONFIG)
+    )
+
+
+def refresh_search_vectors(recipes):
+    """
+    Recomputes the stored search vector of the given recipes in one UPDATE.
+
+    Args:
+        recipes: A Recipe queryset.
+    """
+
+    recipes.update(search_vector=search_vector())
+
+
+@contextmanager
+def deferred_refresh():
+    """
+    Collects the recipes to reindex and refreshes them in one UPDATE on exit.
+
+    Explanation:
+    Saving a recipe and setting its tags and ingredients each fire a signal that
+    reindexes it. Inside this block those signals only note the recipe, so a
+    serializer save costs one UPDATE, issued once the relations are in place. Nested
+    blocks join the outermost one, and nothing is refreshed if the block raises.
+    """
+
+    if _pending.get() is not None:
+        yield
+        return
+    pending = set()
+    token = _pending.set(pending)
+    try:
+        yield
+    finally:
+        _pending.reset(token)
+    if pending:
+        refresh_search_vectors(Recipe.objects.filter(pk__in=pending))
+
+
+def schedule_refresh(recipe_ids):
+    """
+    Reindexes recipes now, or when the enclosing deferred_refresh block ends.
+
+    Args:
+        recipe_ids: The ids of the recipes to reindex.
+    """
+
+    pending = _pending.get()
+    if pending is None:
+        refresh_search_vectors(Recipe.objects.filter(pk__in=recipe_ids))
+    else:
+        pending.update(recipe_ids)
+
+
+def search_recipes(queryset, text):
+    """
+    Filters recipes by full-text search, falling back to fuzzy title matching.
+
+    Explanation:
+    Matches against the stored search vector are ranked by relevance. When nothing
+    matches, for example because of a typo, recipes with a title similar to the text are
+    returned instead, most similar first. Both paths are served by GIN
+    indexes.
+
+    Args:
+        queryset: The Recipe queryset to search within.
+        text (str): The user's search text.
+
+    Returns:
+        QuerySet: The matching recipes in ranked order.
+    """
+
+    query = SearchQuery(text, search_type="websearch", config=SEARCH_CONFIG)
+    matches = (
+        queryset.filter(search_vector=query)
+        .annotate(rank=SearchRank(F("search_vector"), query))
+        .order_by("-rank", "-id")
+    )
+    if matches.exists():
+        return matches
+
+    return (
+        queryset.filter(title__trigram_similar=text)
+        .annotate(similarity=TrigramSimilarity("title", text))
+        .order_by("-similarity", "-id")
+    )
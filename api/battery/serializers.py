@@ -1,8 +1,29 @@
 from rest_framework import serializers
-from .models import Energy
+from .models import Energy, EnergyRollup
 
 class EnergySerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Energy 
         fields = ('pk', 'wellbeing', 'mental_stress', 'physical_stress', 'date_added')
+
+
+class EnergyRollupSerializer(serializers.ModelSerializer):
+    wellbeing = serializers.FloatField(read_only=True)
+    mental_stress = serializers.FloatField(read_only=True)
+    physical_stress = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = EnergyRollup
+        fields = ('period_start', 'count', 'wellbeing', 'mental_stress', 'physical_stress')
+
+
+class EnergyExportFilterSerializer(serializers.Serializer):
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        start, end = attrs.get("start"), attrs.get("end")
+        if start and end and start > end:
+            raise serializers.ValidationError("start must not be after end.")
+        return attrs
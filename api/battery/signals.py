@@ -0,0 +1,129 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from . import autocomplete, pantry, rollups, search
+from .models import Energy, Ingredient, Recipe, Tag, Tombstone
+
+
+@receiver(pre_save, sender=Energy)
+def remember_previous_energy(sender, instance, raw=False, **kwargs):
+    """Keeps the stored values of an edited entry so its rollups can be corrected."""
+    instance._rollup_previous = None
+    if raw or instance._state.adding:
+        return
+    instance._rollup_previous = (
+        Energy.objects.filter(pk=instance.pk)
+        .only("user_id", "date_added", *rollups.SCORE_FIELDS)
+        .first()
+    )
+
+
+@receiver(post_save, sender=Energy)
+def update_rollups_on_save(sender, instance, created, raw=False, **kwargs):
+    """Adds a new or edited entry to its day and week rollups."""
+    if raw:
+        return
+    previous = getattr(instance, "_rollup_previous", None)
+    rollups.apply_changes(added=[instance], removed=[previous] if previous else [])
+
+
+@receiver(post_delete, sender=Energy)
+def update_rollups_on_delete(sender, instance, **kwargs):
+    """Removes a deleted entry from its day and week rollups."""
+    rollups.apply_changes(removed=[instance])
+
+
+@receiver(post_delete, sender=Energy)
+@receiver(post_delete, sender=Recipe)
+def record_tombstone(sender, instance, origin=None, **kwargs):
+    """Records a deleted entry or recipe for the delta-sync feeds."""
+    if isinstance(origin, get_user_model()):
+        # The owner is being deleted along with every tombstone they hold.
+        return
+    model = Tombstone.ENERGY if sender is Energy else Tombstone.RECIPE
+    Tombstone.objects.create(user_id=instance.user_id, model=model, object_id=instance.pk)
+
+
+@receiver(post_save, sender=Recipe)
+def refresh_search_vector_on_save(sender, instance, raw=False, **kwargs):
+    """Reindexes a recipe whose title or description may have changed."""
+    if not raw:
+        search.schedule_refresh([instance.pk])
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def refresh_search_vector_on_relation_change(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    """Reindexes recipes whose tags or ingredients were added or removed."""
+    if reverse and action == "pre_clear":
+        instance._search_recipe_ids = list(instance.recipe_set.values_list("pk", flat=True))
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if not reverse:
+        recipe_ids = [instance.pk]
+    elif action == "post_clear":
+        recipe_ids = instance._search_recipe_ids
+    else:
+        recipe_ids = pk_set
+    search.schedule_refresh(recipe_ids)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def refresh_search_vector_on_rename(sender, instance, created, raw=False, **kwargs):
+    """Reindexes the recipes using a renamed tag or ingredient."""
+    if not created and not raw:
+        recipes = Recipe.objects.filter(**{f"{sender._meta.model_name}s": instance})
+        search.refresh_search_vectors(recipes)
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def remember_recipes_before_delete(sender, instance, origin=None, **kwargs):
+    """Keeps the recipes of a tag or ingredient before its links are removed."""
+    instance._search_recipe_ids = []
+    if not isinstance(origin, get_user_model()):
+        instance._search_recipe_ids = list(instance.recipe_set.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def refresh_search_vector_on_delete(sender, instance, **kwargs):
+    """Reindexes the recipes that used a deleted tag or ingredient."""
+    recipe_ids = getattr(instance, "_search_recipe_ids", [])
+    if recipe_ids:
+        search.refresh_search_vectors(Recipe.objects.filter(pk__in=recipe_ids))
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_pantry_index(sender, instance, **kwargs):
+    """Drops the pantry index of the owner of a changed recipe or ingredient."""
+    pantry.invalidate(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def invalidate_pantry_index_on_relation_change(sender, instance, action, **kwargs):
+    """Drops the pantry index when recipe ingredients are linked or unlinked."""
+    if action in ("post_add", "post_remove", "post_clear"):
+        pantry.invalidate(instance.user_id)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_autocomplete(sender, instance, **kwargs):
+    """Drops the cached autocomplete names of the owner of a tag or ingredient."""
+    autocomplete.invalidate(sender, instance.user_id)
@@ -0,0 +1,98 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .models import Tombstone
+
+
+def encode_cursor(xid, moment):
+    payload = json.dumps([xid, moment.isoformat()]).encode("ascii")
+    return urlsafe_b64encode(payload).decode("ascii")
+
+
+def decode_cursor(value):
+    """
+    Reads a cursor issued by changes_since.
+
+    Args:
+        value (str): The cursor sent by the client.
+
+    Returns:
+        tuple: The transaction id and the time the cursor was issued.
+
+    Raises:
+        ValidationError: If the cursor cannot be decoded.
+    """
+    try:
+        xid, moment = json.loads(urlsafe_b64decode(value.encode("ascii")))
+        moment = datetime.fromisoformat(moment)
+    except (TypeError, ValueError, UnicodeError):
+        raise ValidationError({"since": ["Invalid cursor."]})
+    if not isinstance(xid, int) or timezone.is_naive(moment):
+        raise ValidationError({"since": ["Invalid cursor."]})
+    return xid, moment
+
+
+def _oldest_running_xid():
+    # Every transaction with a lower id had committed or aborted when this ran.
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT txid_snapshot_xmin(txid_current_snapshot())")
+        return cursor.fetchone()[0]
+
+
+def changes_since(request, queryset, model):
+    """
+    Collects the objects changed and deleted since the client's last sync.
+
+    Explanation:
+    Synced rows are stamped by a trigger with the id of the transaction that last
+    wrote them. The cursor is the oldest transaction still running when it is
+    issued, so rows written by a transaction that commits after the feed was read
+    are sent on the next sync, however long it ran and whatever the host clocks say.
+    Rows may be sent twice; clients apply the feed as upserts. Without a cursor, or
+    with one older than the tombstone retention, the whole collection is returned
+    with reset set, and the client replaces its copy.
+
+    Args:
+        request: The incoming request, with an optional since cursor.
+        queryset: The user's objects of the synced model.
+        model (str): The Tombstone model label for the synced model.
+
+    Returns:
+        tuple: The new cursor, the changed objects, the ids of deleted objects and
+        whether the client must replace its copy.
+
+    Raises:
+        ValidationError: If the since cursor cannot be decoded.
+    """
+
+    now = timezone.now()
+    cursor = encode_cursor(_oldest_running_xid(), now)
+    since = request.query_params.get("since")
+    if since is None:
+        return cursor, queryset, [], True
+    xid, issued = decode_cursor(since)
+    if issued < now - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS):
+        return cursor, queryset, [], True
+
+    deleted = Tombstone.objects.filter(
+        user=request.user, model=model, change_xid__gte=xid
+    ).values_list("object_id", flat=True)
+    return cursor, queryset.filter(change_xid__gte=xid), list(deleted), False
+
+
+def prune_tombstones():
+    """
+    Deletes tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS.
+
+    Returns:
+        int: The number of tombstones deleted.
+    """
+    horizon = timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+    deleted, _ = Tombstone.objects.filter(deleted_at__lt=horizon).delete()
+    return deleted
@@ -0,0 +1,56 @@
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+class _AssertMaxQueriesContext(CaptureQueriesContext):
+    def __init__(self, test_case, num, connection):
+        self.test_case = test_case
+        self.num = num
+        super().__init__(connection)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        super().__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None:
+            return
+        executed = len(self)
+        self.test_case.assertLessEqual(
+            executed,
+            self.num,
+            f"{executed} queries executed, at most {self.num} expected\n"
+            "Captured queries were:\n"
+            + "\n".join(
+                f"{i}. {query['sql']}"
+                for i, query in enumerate(self.captured_queries, start=1)
+            ),
+        )
+
+
+class QueryBudgetMixin:
+    """
+    Adds assertMaxQueries to a test case.
+
+    Explanation:
+    Unlike assertNumQueries, the assertion passes with fewer queries than the budget,
+    so it pins the upper bound of an endpoint without failing when a query is
+    optimised away. Budgets are best checked against several rows so that a query
+    per row overshoots them.
+    """
+
+    def assertMaxQueries(self, num, func=None, *args, using=DEFAULT_DB_ALIAS, **kwargs):
+        """
+        Asserts that at most num queries are executed.
+
+        Args:
+            num (int): The largest number of queries allowed.
+            func (callable): Called with args and kwargs if given, otherwise a context
+                manager is returned.
+            using (str): The alias of the database to count queries on.
+
+        Returns:
+            The context manager when func is not given.
+        """
+        context = _AssertMaxQueriesContext(self, num, connections[using])
+        if func is None:
+            return context
+        with context:
+            func(*args, **kwargs)
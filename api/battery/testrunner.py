@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """
+    The project's test runner, reporting N+1 queries made through the test client.
+
+    Explanation:
+    Django runs tests with DEBUG off, so the runner switches NPLUSONE_DETECTION on
+    itself. Repeated query shapes are logged unless --fail-on-nplusone is passed,
+    which makes the offending requests raise and their tests fail.
+    """
+
+    def __init__(self, fail_on_nplusone=False, **kwargs):
+        super().__init__(**kwargs)
+        self.fail_on_nplusone = fail_on_nplusone
+
+    @classmethod
+    def add_arguments(cls, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--fail-on-nplusone",
+            action="store_true",
+            help="Fail tests whose requests repeat a query shape.",
+        )
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        settings.NPLUSONE_DETECTION = True
+        settings.NPLUSONE_RAISE = settings.NPLUSONE_RAISE or self.fail_on_nplusone
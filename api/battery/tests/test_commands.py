@@ -1,10 +1,15 @@
 """Test custom management commands."""
 
+from io import StringIO
 from unittest.mock import patch
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from psycopg2 import OperationalError as Psycopg2Error
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, TestCase
+
+from battery.models import Energy, EnergyRollup
+from battery.tests.test_models import create_user
 
 
 @patch("battery.management.commands.wait_for_db.Command.check")
@@ -40,3 +45,69 @@ class CommandTests(SimpleTestCase):
         call_command("wait_for_db")
         self.assertEqual(patched_check.call_count, 6)
         patched_check.assert_called_with(databases=["default"])
+
+    @patch("time.sleep")
+    def test_wait_for_db_backs_off(self, patched_sleep, patched_check):
+        """Test retries start below a second and grow towards the one second cap."""
+        patched_check.side_effect = [OperationalError] * 8 + [True]
+
+        call_command("wait_for_db", stdout=StringIO())
+
+        waits = [call.args[0] for call in patched_sleep.call_args_list]
+        self.assertLess(waits[0], 0.1)
+        self.assertLessEqual(max(waits), 1)
+        self.assertGreater(waits[-1], waits[0])
+
+    @patch("time.sleep")
+    def test_wait_for_db_timeout(self, patched_sleep, patched_check):
+        """Test the command gives up once the deadline has passed."""
+        patched_check.side_effect = OperationalError
+
+        with self.assertRaises(CommandError):
+            call_command("wait_for_db", timeout=0, stdout=StringIO())
+        patched_sleep.assert_not_called()
+
+
+@patch("battery.management.commands.wait_for_db.call_command")
+@patch("battery.management.commands.wait_for_db.Command.check")
+class WaitForDbMigrateTests(TestCase):
+    """Test applying migrations once the database is available."""
+
+    def test_migrate_skipped_when_up_to_date(self, patched_check, patched_migrate):
+        """Test migrate does not run when the migration plan is empty."""
+        out = StringIO()
+        call_command("wait_for_db", migrate=True, stdout=out)
+
+        patched_migrate.assert_not_called()
+        self.assertIn("No migrations to apply.", out.getvalue())
+
+    @patch("battery.management.commands.wait_for_db.Command.pending_migrations")
+    def test_migrate_runs_when_pending(self, patched_pending, patched_check, patched_migrate):
+        """Test migrate runs when migrations are pending."""
+        patched_pending.return_value = [("battery", "0019_example")]
+        call_command("wait_for_db", migrate=True, stdout=StringIO())
+
+        patched_migrate.assert_called_once()
+        self.assertEqual(patched_migrate.call_args.args, ("migrate",))
+
+
+class BackfillEnergyRollupsTests(TestCase):
+    """Test rebuilding the energy rollups."""
+
+    def test_backfill_rebuilds_rollups(self):
+        """Test the command recomputes rollups that have drifted from the journal."""
+        user = create_user()
+        for wellbeing in (2, 6):
+            Energy.objects.create(
+                user=user, wellbeing=wellbeing, mental_stress=5, physical_stress=5
+            )
+        EnergyRollup.objects.all().delete()
+
+        call_command("backfill_energy_rollups", stdout=StringIO())
+
+        day = EnergyRollup.objects.get(user=user, bucket=EnergyRollup.DAY)
+        self.assertEqual(day.count, 2)
+        self.assertEqual(day.wellbeing, 4)
+        self.assertTrue(
+            EnergyRollup.objects.filter(user=user, bucket=EnergyRollup.WEEK).exists()
+        )
@@ -0,0 +1,175 @@
+"""Tests for the database connection, cache and worker settings."""
+
+import importlib
+import os
+import runpy
+from copy import deepcopy
+from unittest.mock import patch
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase
+
+import api.settings
+from battery.models import Energy
+from battery.tests.test_models import create_user
+
+
+SETTINGS_VARIABLES = (
+    "DB_POOLER_MODE",
+    "DB_CONN_MAX_AGE",
+    "DB_CONN_HEALTH_CHECKS",
+    "DB_CONNECT_TIMEOUT",
+    "DB_STATEMENT_TIMEOUT",
+    "CACHE_URL",
+    "PASSWORD_HASHER",
+)
+GUNICORN_CONFIG = settings.BASE_DIR / "gunicorn.conf.py"
+
+
+def load_setting(name, **environ):
+    """Return a setting evaluated with the given variables."""
+    try:
+        with patch.dict(os.environ):
+            for variable in SETTINGS_VARIABLES:
+                os.environ.pop(variable, None)
+            os.environ.update(environ)
+            return deepcopy(getattr(importlib.reload(api.settings), name))
+    finally:
+        importlib.reload(api.settings)
+
+
+def load_database(**environ):
+    """Return the default database settings evaluated with the given variables."""
+    return load_setting("DATABASES", **environ)["default"]
+
+
+def load_gunicorn_config(**environ):
+    """Return the gunicorn configuration evaluated with the given variables."""
+    with patch.dict(os.environ, clear=True):
+        os.environ.update(environ)
+        return runpy.run_path(str(GUNICORN_CONFIG))
+
+
+class DatabaseSettingsTests(SimpleTestCase):
+    """Test the database settings read from the environment."""
+
+    def test_persistent_health_checked_connections_by_default(self):
+        """Test connections are kept open, health checked and time limited."""
+        database = load_database()
+
+        self.assertEqual(database["CONN_MAX_AGE"], 60)
+        self.assertTrue(database["CONN_HEALTH_CHECKS"])
+        self.assertFalse(database["DISABLE_SERVER_SIDE_CURSORS"])
+        self.assertEqual(database["OPTIONS"]["connect_timeout"], 5)
+        self.assertEqual(database["OPTIONS"]["options"], "-c statement_timeout=30000")
+
+    def test_settings_from_environment(self):
+        """Test every connection setting can be overridden."""
+        database = load_database(
+            DB_CONN_MAX_AGE="0",
+            DB_CONN_HEALTH_CHECKS="false",
+            DB_CONNECT_TIMEOUT="2",
+            DB_STATEMENT_TIMEOUT="1500",
+        )
+
+        self.assertEqual(database["CONN_MAX_AGE"], 0)
+        self.assertFalse(database["CONN_HEALTH_CHECKS"])
+        self.assertEqual(database["OPTIONS"]["connect_timeout"], 2)
+        self.assertEqual(database["OPTIONS"]["options"], "-c statement_timeout=1500")
+
+    def test_transaction_pooler_mode(self):
+        """Test pooler mode disables server-side cursors and startup options."""
+        database = load_database(DB_POOLER_MODE="transaction")
+
+        self.assertTrue(database["DISABLE_SERVER_SIDE_CURSORS"])
+        self.assertNotIn("options", database["OPTIONS"])
+
+    def test_unknown_pooler_mode(self):
+        """Test an unknown pooler mode is refused at startup."""
+        with self.assertRaises(ImproperlyConfigured):
+            load_database(DB_POOLER_MODE="statement")
+
+
+class CacheSettingsTests(SimpleTestCase):
+    """Test the cache shared between worker processes."""
+
+    def test_local_memory_without_cache_url(self):
+        """Test each process keeps its own cache when no shared cache is configured."""
+        caches = load_setting("CACHES")
+
+        self.assertEqual(
+            caches["default"]["BACKEND"], "django.core.cache.backends.locmem.LocMemCache"
+        )
+
+    def test_redis_cache_url(self):
+        """Test a redis URL selects the redis backend."""
+        caches = load_setting("CACHES", CACHE_URL="redis://redis:6379/0")
+
+        self.assertEqual(
+            caches["default"]["BACKEND"], "django.core.cache.backends.redis.RedisCache"
+        )
+        self.assertEqual(caches["default"]["LOCATION"], "redis://redis:6379/0")
+
+    def test_database_cache_url(self):
+        """Test a db URL selects the database backend and its table."""
+        caches = load_setting("CACHES", CACHE_URL="db://api_cache")
+
+        self.assertEqual(
+            caches["default"]["BACKEND"], "django.core.cache.backends.db.DatabaseCache"
+        )
+        self.assertEqual(caches["default"]["LOCATION"], "api_cache")
+
+    def test_unknown_cache_url(self):
+        """Test an unsupported cache URL is refused at startup."""
+        with self.assertRaises(ImproperlyConfigured):
+            load_setting("CACHES", CACHE_URL="memcached://cache:11211")
+
+
+class GunicornConfigTests(SimpleTestCase):
+    """Test the worker count is limited by the cache and database connections."""
+
+    def test_single_worker_without_shared_cache(self):
+        """Test one worker is run when the cache is per process."""
+        config = load_gunicorn_config()
+
+        self.assertEqual(config["workers"], 1)
+
+    def test_multiple_workers_need_shared_cache(self):
+        """Test extra workers are refused without a shared cache."""
+        with self.assertRaises(RuntimeError):
+            load_gunicorn_config(GUNICORN_WORKERS="4")
+
+    def test_workers_capped_by_database_connections(self):
+        """Test workers times threads stays within the connection limit."""
+        config = load_gunicorn_config(
+            CACHE_URL="redis://redis:6379/0", GUNICORN_WORKERS="33", GUNICORN_THREADS="4"
+        )
+
+        self.assertEqual(config["workers"], 20)
+        self.assertLessEqual(config["workers"] * config["threads"], 80)
+
+
+class DatabaseConnectionTests(TestCase):
+    """Test the settings take effect on a Postgres connection."""
+
+    def test_statement_timeout_applied(self):
+        """Test the statement timeout is set when connecting."""
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT setting FROM pg_settings WHERE name = 'statement_timeout'")
+            self.assertEqual(cursor.fetchone()[0], str(settings.DB_STATEMENT_TIMEOUT))
+
+    def test_iterating_without_server_side_cursors(self):
+        """Test chunked iteration uses no named cursor in pooler mode."""
+        user = create_user()
+        Energy.objects.create(user=user, wellbeing=5, mental_stress=5, physical_stress=5)
+
+        with (
+            patch.dict(connection.settings_dict, {"DISABLE_SERVER_SIDE_CURSORS": True}),
+            patch.object(connection, "chunked_cursor") as chunked_cursor,
+        ):
+            entries = list(Energy.objects.iterator(chunk_size=1))
+
+        self.assertEqual(len(entries), 1)
+        chunked_cursor.assert_not_called()
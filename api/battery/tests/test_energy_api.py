@@ -0,0 +1,562 @@
+"""Tests for the energy journal api."""
+
+import csv
+import json
+from datetime import date, datetime, timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from battery.models import Energy, EnergyRollup, Tombstone
+from battery.pagination import EnergyKeysetPagination
+from battery.serializers import EnergySerializer
+from battery.tests.test_models import create_user
+
+ENERGY_URL = "/api/energy-journal/"
+BULK_URL = "/api/energy-journal/bulk/"
+ROLLUPS_URL = "/api/energy-journal/rollups/"
+EXPORT_URL = "/api/energy-journal/export.{}"
+CHANGES_URL = "/api/energy-journal/changes/"
+
+
+def detail_url(energy_id):
+    """Return energy detail URL."""
+    return f"{ENERGY_URL}{energy_id}"
+
+
+def create_energy(user, **params):
+    """Create and return a new energy entry."""
+    defaults = {"wellbeing": 5, "mental_stress": 5, "physical_stress": 5} | params
+    return Energy.objects.create(user=user, **defaults)
+
+
+class PublicEnergyApiTests(TestCase):
+    """Test unauthenticated energy journal requests."""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        """Test auth is required for the energy journal."""
+        res = self.client.get(ENERGY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateEnergyApiTests(TestCase):
+    """Test the energy journal for an authenticated user."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_journal_limited_to_user(self):
+        """Test the journal only lists entries owned by the user."""
+        other_user = create_user()
+        create_energy(other_user)
+        energy = create_energy(self.user)
+
+        res = self.client.get(ENERGY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([item["pk"] for item in res.data], [energy.pk])
+
+    def test_create_energy_assigns_user(self):
+        """Test creating an entry records the authenticated user as owner."""
+        payload = {"wellbeing": 7, "mental_stress": 3, "physical_stress": 2}
+
+        res = self.client.post(ENERGY_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Energy.objects.get().user, self.user)
+
+    def test_other_users_entry_not_found(self):
+        """Test another user's entry cannot be updated or deleted."""
+        energy = create_energy(create_user())
+
+        res = self.client.delete(detail_url(energy.pk))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertTrue(Energy.objects.filter(pk=energy.pk).exists())
+
+
+class EnergyJournalPaginationTests(TestCase):
+    """Test cursor pagination of the energy journal."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_unpaginated_list_by_default(self):
+        """Test the journal returns a plain list when no cursor is requested."""
+        create_energy(self.user)
+        create_energy(self.user)
+
+        res = self.client.get(ENERGY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 2)
+
+    def test_walk_pages_forward_and_back(self):
+        """Test following next and previous cursors visits every entry once."""
+        entries = [create_energy(self.user, wellbeing=i % 10 + 1) for i in range(7)]
+        # Give some entries the same timestamp so the id tiebreak is exercised.
+        tied = timezone.now() - timedelta(days=1)
+        Energy.objects.filter(pk__in=[e.pk for e in entries[2:5]]).update(date_added=tied)
+        expected = list(Energy.objects.order_by("date_added", "id"))
+
+        seen = []
+        url = f"{ENERGY_URL}?page_size=3"
+        pages = []
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            pages.append(res.data)
+            seen.extend(item["pk"] for item in res.data["results"])
+            url = res.data["next"]
+
+        self.assertEqual(seen, [e.pk for e in expected])
+        self.assertEqual(len(pages), 3)
+        self.assertIsNone(pages[0]["previous"])
+
+        res = self.client.get(pages[-1]["previous"])
+        self.assertEqual(res.data["results"], pages[1]["results"])
+
+    def test_page_size_is_bounded(self):
+        """Test a requested page size is capped at the maximum."""
+        for _ in range(4):
+            create_energy(self.user)
+
+        with patch.object(EnergyKeysetPagination, "max_page_size", 3):
+            res = self.client.get(f"{ENERGY_URL}?page_size=100000")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 3)
+        self.assertIsNotNone(res.data["next"])
+
+    def test_invalid_cursor(self):
+        """Test an undecodable cursor returns a 404."""
+        res = self.client.get(f"{ENERGY_URL}?cursor=not-a-cursor")
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_page_query_count_is_constant(self):
+        """Test a page costs one query with no COUNT or OFFSET."""
+        for _ in range(6):
+            create_energy(self.user)
+        res = self.client.get(f"{ENERGY_URL}?page_size=2")
+
+        with self.assertNumQueries(1):
+            res = self.client.get(res.data["next"])
+
+        self.assertEqual(len(res.data["results"]), 2)
+
+
+class EnergyFastListTests(TestCase):
+    """Test the journal renders identically through the .values() fast path."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        for i in range(5):
+            create_energy(self.user, wellbeing=i + 1, physical_stress=10 - i)
+
+    def assert_same_content(self, url):
+        slow = self.client.get(url)
+        with override_settings(FAST_LIST_SERIALIZATION=True):
+            fast = self.client.get(url)
+
+        self.assertEqual(fast.status_code, status.HTTP_200_OK)
+        self.assertEqual(fast.content, slow.content)
+        return fast
+
+    def test_unpaginated_list(self):
+        """Test the plain list is byte-identical."""
+        self.assert_same_content(ENERGY_URL)
+
+    def test_paginated_list(self):
+        """Test every page and its cursors are byte-identical."""
+        url = f"{ENERGY_URL}?page_size=2"
+        while url:
+            url = self.assert_same_content(url).data["next"]
+
+    @override_settings(FAST_LIST_SERIALIZATION=True)
+    def test_list_is_one_query(self):
+        """Test the fast path reads the journal in a single query."""
+        with self.assertNumQueries(1):
+            self.client.get(ENERGY_URL)
+
+
+class EnergyBulkApiTests(TestCase):
+    """Test bulk ingestion of energy entries."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_create_from_json_array(self):
+        """Test a JSON array of entries is created for the user."""
+        payload = [
+            {"wellbeing": 7, "mental_stress": 3, "physical_stress": 2},
+            {"wellbeing": 4, "mental_stress": 6, "physical_stress": 5},
+        ]
+
+        res = self.client.post(BULK_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data["created"]), 2)
+        self.assertEqual(res.data["errors"], [])
+        self.assertEqual(Energy.objects.filter(user=self.user).count(), 2)
+
+    def test_bulk_create_from_ndjson(self):
+        """Test an NDJSON stream of entries is created for the user."""
+        body = (
+            b'{"wellbeing": 7, "mental_stress": 3, "physical_stress": 2}\n'
+            b"\n"
+            b'{"wellbeing": 4, "mental_stress": 6, "physical_stress": 5}\n'
+        )
+
+        res = self.client.post(BULK_URL, body, content_type="application/x-ndjson")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Energy.objects.filter(user=self.user).count(), 2)
+
+    def test_invalid_rows_reported_without_aborting_valid_rows(self):
+        """Test invalid items are reported by index and valid items still saved."""
+        payload = [
+            {"wellbeing": 7, "mental_stress": 3, "physical_stress": 2},
+            {"wellbeing": 11, "mental_stress": 3, "physical_stress": 2},
+            "not an entry",
+        ]
+
+        res = self.client.post(BULK_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data["created"]), 1)
+        self.assertEqual([error["index"] for error in res.data["errors"]], [1, 2])
+        self.assertIn("wellbeing", res.data["errors"][0]["errors"])
+        self.assertEqual(Energy.objects.count(), 1)
+
+    @override_settings(ENERGY_BULK_BATCH_SIZE=2)
+    def test_bulk_create_in_chunks(self):
+        """Test entries are inserted in batches inside a single transaction."""
+        payload = [{"wellbeing": 5, "mental_stress": 5, "physical_stress": 5}] * 5
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(BULK_URL, payload, format="json")
+
+        inserts = [
+            q for q in queries if q["sql"].startswith('INSERT INTO "battery_energy" ')
+        ]
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(inserts), 3)
+        self.assertEqual(Energy.objects.count(), 5)
+
+    def test_non_list_payload_rejected(self):
+        """Test a payload that is not a list of entries is rejected."""
+        payload = {"wellbeing": 5, "mental_stress": 5, "physical_stress": 5}
+
+        res = self.client.post(BULK_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Energy.objects.exists())
+
+    def test_malformed_ndjson_rejected(self):
+        """Test a malformed NDJSON line rejects the request."""
+        body = b'{"wellbeing": 7, "mental_stress": 3, "physical_stress": 2}\n{oops\n'
+
+        res = self.client.post(BULK_URL, body, content_type="application/x-ndjson")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Energy.objects.exists())
+
+    def test_undecodable_ndjson_rejected(self):
+        """Test a line that is not valid UTF-8 rejects the request with its line number."""
+        body = b'{"wellbeing": 5}\n\xff\xfe\n'
+
+        res = self.client.post(BULK_URL, body, content_type="application/x-ndjson")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("line 2", res.data["detail"])
+        self.assertFalse(Energy.objects.exists())
+
+
+class EnergyRollupApiTests(TestCase):
+    """Test the incrementally maintained energy rollups."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get_rollup(self, bucket="day"):
+        res = self.client.get(ROLLUPS_URL, {"bucket": bucket})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def test_rollups_follow_create_update_and_delete(self):
+        """Test rollups track entries as they are created, edited and deleted."""
+        create_energy(self.user, wellbeing=4, mental_stress=2, physical_stress=6)
+        energy = create_energy(self.user, wellbeing=8, mental_stress=4, physical_stress=2)
+
+        data = self.get_rollup()
+        self.assertEqual(len(data), 1)
+        self.assertEqual(data[0]["count"], 2)
+        self.assertEqual(data[0]["wellbeing"], 6.0)
+        self.assertEqual(data[0]["mental_stress"], 3.0)
+        self.assertEqual(data[0]["physical_stress"], 4.0)
+
+        payload = {"wellbeing": 2, "mental_stress": 4, "physical_stress": 2}
+        self.client.put(detail_url(energy.pk), payload)
+        self.assertEqual(self.get_rollup()[0]["wellbeing"], 3.0)
+
+        self.client.delete(detail_url(energy.pk))
+        data = self.get_rollup("week")
+        self.assertEqual(data[0]["count"], 1)
+        self.assertEqual(data[0]["wellbeing"], 4.0)
+
+    def test_rollup_row_removed_when_empty(self):
+        """Test a bucket disappears once its last entry is deleted."""
+        energy = create_energy(self.user)
+
+        energy.delete()
+
+        self.assertFalse(EnergyRollup.objects.exists())
+
+    def test_bulk_ingestion_updates_rollups(self):
+        """Test entries created in bulk are included in the rollups."""
+        payload = [{"wellbeing": 5, "mental_stress": 5, "physical_stress": 5}] * 3
+
+        self.client.post(BULK_URL, payload, format="json")
+
+        self.assertEqual(self.get_rollup()[0]["count"], 3)
+        self.assertEqual(self.get_rollup("week")[0]["count"], 3)
+
+    def test_rollups_limited_to_user(self):
+        """Test rollups only cover the authenticated user's entries."""
+        create_energy(create_user())
+
+        self.assertEqual(self.get_rollup(), [])
+
+    def test_week_bucket_starts_on_monday(self):
+        """Test entries from one week share a bucket starting on Monday."""
+        wednesday = timezone.make_aware(datetime(2024, 7, 10, 12))
+        sunday = timezone.make_aware(datetime(2024, 7, 14, 12))
+        for date_added in (wednesday, sunday):
+            energy = create_energy(self.user)
+            Energy.objects.filter(pk=energy.pk).update(date_added=date_added)
+        call_command("backfill_energy_rollups", stdout=StringIO())
+
+        weeks = self.get_rollup("week")
+        self.assertEqual(len(self.get_rollup("day")), 2)
+        self.assertEqual(len(weeks), 1)
+        self.assertEqual(weeks[0]["period_start"], "2024-07-08")
+
+    def test_invalid_bucket(self):
+        """Test an unknown bucket is rejected."""
+        res = self.client.get(ROLLUPS_URL, {"bucket": "month"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class EnergyExportApiTests(TestCase):
+    """Test streaming exports of the energy journal."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_entry_on(self, day, **params):
+        energy = create_energy(self.user, **params)
+        date_added = timezone.make_aware(datetime.combine(day, datetime.min.time()))
+        Energy.objects.filter(pk=energy.pk).update(date_added=date_added)
+        energy.refresh_from_db()
+        return energy
+
+    def test_export_csv(self):
+        """Test the journal is streamed as CSV with a header row."""
+        energy = self.create_entry_on(date(2024, 7, 1), wellbeing=8)
+        create_energy(create_user())
+
+        res = self.client.get(EXPORT_URL.format("csv"))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res["Content-Type"], "text/csv")
+        rows = list(csv.reader(StringIO(b"".join(res.streaming_content).decode())))
+        self.assertEqual(
+            rows,
+            [
+                ["pk", "wellbeing", "mental_stress", "physical_stress", "date_added"],
+                [str(energy.pk), "8", "5", "5", "2024-07-01T00:00:00Z"],
+            ],
+        )
+
+    def test_export_ndjson_matches_serializer(self):
+        """Test NDJSON rows match the journal API representation."""
+        entries = [self.create_entry_on(date(2024, 7, day)) for day in (1, 2)]
+
+        res = self.client.get(EXPORT_URL.format("ndjson"))
+
+        lines = b"".join(res.streaming_content).decode().splitlines()
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+        self.assertEqual(
+            [json.loads(line) for line in lines],
+            EnergySerializer(entries, many=True).data,
+        )
+
+    def test_export_date_range(self):
+        """Test start and end dates limit the exported rows inclusively."""
+        for day in (1, 2, 3, 4):
+            self.create_entry_on(date(2024, 7, day), wellbeing=day)
+
+        res = self.client.get(
+            EXPORT_URL.format("ndjson"), {"start": "2024-07-02", "end": "2024-07-03"}
+        )
+
+        lines = b"".join(res.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)["wellbeing"] for line in lines], [2, 3])
+
+    def test_export_invalid_date_range(self):
+        """Test a start date after the end date is rejected."""
+        res = self.client.get(
+            EXPORT_URL.format("csv"), {"start": "2024-07-03", "end": "2024-07-02"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class EnergyChangesApiTests(TransactionTestCase):
+    """
+    Test the energy journal delta-sync feed.
+
+    Explanation:
+    The feed tells writes apart by transaction, so each request must commit on its own
+    rather than share the transaction TestCase wraps around a test.
+    """
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_initial_sync_returns_everything(self):
+        """Test a sync without a cursor returns the whole journal."""
+        energy = create_energy(self.user)
+        create_energy(create_user())
+
+        res = self.client.get(CHANGES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([item["pk"] for item in res.data["changed"]], [energy.pk])
+        self.assertEqual(res.data["deleted"], [])
+        self.assertTrue(res.data["cursor"])
+
+    def test_sync_returns_only_changes(self):
+        """Test a sync with a cursor returns only what changed since."""
+        unchanged = create_energy(self.user)
+        edited = create_energy(self.user)
+        removed = create_energy(self.user)
+        cursor = self.client.get(CHANGES_URL).data["cursor"]
+
+        created = create_energy(self.user)
+        payload = {"wellbeing": 9, "mental_stress": 1, "physical_stress": 1}
+        self.client.put(detail_url(edited.pk), payload)
+        self.client.delete(detail_url(removed.pk))
+        res = self.client.get(CHANGES_URL, {"since": cursor})
+
+        changed = {item["pk"]: item for item in res.data["changed"]}
+        self.assertEqual(set(changed), {edited.pk, created.pk})
+        self.assertNotIn(unchanged.pk, changed)
+        self.assertEqual(changed[edited.pk]["wellbeing"], 9)
+        self.assertEqual(res.data["deleted"], [removed.pk])
+
+    def test_deleting_user_leaves_no_tombstones(self):
+        """Test cascading a user deletion does not record tombstones."""
+        create_energy(self.user)
+
+        self.user.delete()
+
+        self.assertFalse(Tombstone.objects.exists())
+
+    def test_invalid_cursor(self):
+        """Test an undecodable cursor is rejected."""
+        res = self.client.get(CHANGES_URL, {"since": "nope"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_write_committed_after_sync_is_not_missed(self):
+        """Test a row written by a transaction still open during a sync comes next time."""
+        writer = connection.copy()
+        try:
+            writer.set_autocommit(False)
+            with writer.cursor() as cursor:
+                cursor.execute(
+                    "INSERT INTO battery_energy (user_id, wellbeing, mental_stress, "
+                    "physical_stress, date_added, change_xid) "
+                    "VALUES (%s, 5, 5, 5, now(), 0) RETURNING id",
+                    [self.user.pk],
+                )
+                pk = cursor.fetchone()[0]
+
+            res = self.client.get(CHANGES_URL)
+            self.assertEqual(res.data["changed"], [])
+            writer.commit()
+        finally:
+            writer.close()
+
+        res = self.client.get(CHANGES_URL, {"since": res.data["cursor"]})
+
+        self.assertEqual([item["pk"] for item in res.data["changed"]], [pk])
+        self.assertFalse(res.data["reset"])
+
+    def test_expired_cursor_resets(self):
+        """Test a cursor older than the tombstone retention gets the whole journal."""
+        energy = create_energy(self.user)
+        cursor = self.client.get(CHANGES_URL).data["cursor"]
+
+        later = timezone.now() + timedelta(days=31)
+        with patch("battery.sync.timezone.now", return_value=later):
+            res = self.client.get(CHANGES_URL, {"since": cursor})
+
+        self.assertTrue(res.data["reset"])
+        self.assertEqual([item["pk"] for item in res.data["changed"]], [energy.pk])
+
+    def test_prune_tombstones(self):
+        """Test tombstones past the retention period are deleted."""
+        old, recent = create_energy(self.user).pk, create_energy(self.user).pk
+        Energy.objects.get(pk=old).delete()
+        Energy.objects.get(pk=recent).delete()
+        Tombstone.objects.filter(object_id=old).update(
+            deleted_at=timezone.now() - timedelta(days=31)
+        )
+
+        call_command("prune_tombstones", stdout=StringIO())
+
+        self.assertEqual(list(Tombstone.objects.values_list("object_id", flat=True)), [recent])
+
+    def test_writes_return_saved_entry(self):
+        """Test create and update respond with the saved entry."""
+        payload = {"wellbeing": 7, "mental_stress": 3, "physical_stress": 2}
+
+        res = self.client.post(ENERGY_URL, payload)
+        energy = Energy.objects.get(pk=res.data["pk"])
+        self.assertEqual(res.data, EnergySerializer(energy).data)
+
+        payload["wellbeing"] = 2
+        res = self.client.put(detail_url(energy.pk), payload)
+        energy.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, EnergySerializer(energy).data)
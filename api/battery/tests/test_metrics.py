@@ -0,0 +1,169 @@
+"""Tests for request timing and the metrics endpoint."""
+
+import re
+
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from battery.metrics import RequestMetrics, registry
+from battery.models import Energy
+from battery.tests.test_models import create_user
+
+ENERGY_URL = "/api/energy-journal/"
+METRICS_URL = "/metrics"
+
+
+@override_settings(SERVER_TIMING=True, METRICS_ENABLED=True)
+class TimingMiddlewareTests(TestCase):
+    """Test the Server-Timing header and the per route histograms."""
+
+    def setUp(self):
+        registry.reset()
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_server_timing_header(self):
+        """Test responses carry the SQL, render and total timings."""
+        Energy.objects.create(
+            user=self.user, wellbeing=5, mental_stress=5, physical_stress=5
+        )
+
+        res = self.client.get(ENERGY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        timing = res["Server-Timing"]
+        self.assertRegex(timing, r'db;dur=[0-9.]+;desc="[1-9][0-9]* queries"')
+        for metric in ("app", "render", "total"):
+            self.assertRegex(timing, rf"{metric};dur=[0-9.]+")
+
+    def test_metrics_histograms_per_route(self):
+        """Test requests are recorded under their route and exported for Prometheus."""
+        self.client.get(ENERGY_URL)
+        self.client.get(ENERGY_URL)
+        self.client.get("/api/recipe/recipes/")
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res["Content-Type"].startswith("text/plain; version=0.0.4"))
+        body = res.content.decode()
+        self.assertIn(
+            'http_request_duration_seconds_count{route="energy_journal",method="GET"} 2',
+            body,
+        )
+        self.assertIn(
+            'http_request_duration_seconds_bucket{route="recipe-list",method="GET",le="+Inf"} 1',
+            body,
+        )
+        queries = re.search(
+            r'http_request_db_queries_total\{route="energy_journal",method="GET"\} (\d+)',
+            body,
+        )
+        self.assertGreater(int(queries.group(1)), 0)
+
+    def test_unmatched_paths_share_a_route(self):
+        """Test unknown paths do not create a series per path."""
+        self.client.get("/nothing-here/")
+        self.client.get("/nothing-there/")
+
+        body = self.client.get(METRICS_URL).content.decode()
+
+        self.assertIn(
+            'http_request_duration_seconds_count{route="unmatched",method="GET"} 2', body
+        )
+
+    def test_workers_share_totals(self):
+        """Test a scrape reports the requests of every worker, including exited ones."""
+        workers = [RequestMetrics(), RequestMetrics()]
+        workers[0].observe("energy_journal", "GET", 0.02, 0.01, 2, 0.0)
+        workers[1].observe("energy_journal", "GET", 0.3, 0.1, 3, 0.0)
+        workers[1].observe("recipe-list", "GET", 0.01, 0.0, 1, 0.0)
+        for worker in workers:
+            worker.flush()
+        workers[0] = RequestMetrics()
+
+        body = workers[0].render()
+
+        self.assertIn(
+            'http_request_duration_seconds_count{route="energy_journal",method="GET"} 2',
+            body,
+        )
+        self.assertIn(
+            'http_request_duration_seconds_bucket{route="energy_journal",method="GET",le="0.25"} 1',
+            body,
+        )
+        self.assertIn(
+            'http_request_db_queries_total{route="energy_journal",method="GET"} 5', body
+        )
+        self.assertIn(
+            'http_request_duration_seconds_count{route="recipe-list",method="GET"} 1', body
+        )
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_metrics_disabled(self):
+        """Test nothing is recorded and the endpoint is hidden when metrics are off."""
+        self.client.get(ENERGY_URL)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(registry.series, {})
+        self.assertEqual(registry.snapshot(), {})
+
+    @override_settings(SERVER_TIMING=False, METRICS_ENABLED=False)
+    def test_middleware_unused_when_disabled(self):
+        """Test the middleware leaves responses alone when both outputs are off."""
+        res = APIClient().get(METRICS_URL)
+
+        self.assertNotIn("Server-Timing", res)
+
+
+@override_settings(
+    METRICS_ENABLED=True, METRICS_ALLOWED_IPS=["10.0.0.0/8"], METRICS_TOKEN="secret"
+)
+class MetricsAccessTests(TestCase):
+    """Test who may read the metrics endpoint."""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_allowed_network(self):
+        """Test clients in an allowed network are served."""
+        res = self.client.get(METRICS_URL, REMOTE_ADDR="10.1.2.3")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_other_address_refused(self):
+        """Test other clients are refused, whatever they claim to forward for."""
+        res = self.client.get(
+            METRICS_URL, REMOTE_ADDR="203.0.113.5", HTTP_X_FORWARDED_FOR="10.1.2.3"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_bearer_token(self):
+        """Test clients outside the networks are served with the token."""
+        res = self.client.get(
+            METRICS_URL, REMOTE_ADDR="203.0.113.5", HTTP_AUTHORIZATION="Bearer secret"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_wrong_token_refused(self):
+        """Test a wrong token is refused."""
+        res = self.client.get(
+            METRICS_URL, REMOTE_ADDR="203.0.113.5", HTTP_AUTHORIZATION="Bearer guess"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(METRICS_TOKEN="")
+    def test_empty_token_never_matches(self):
+        """Test an empty bearer token is refused when no token is configured."""
+        res = self.client.get(
+            METRICS_URL, REMOTE_ADDR="203.0.113.5", HTTP_AUTHORIZATION="Bearer "
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
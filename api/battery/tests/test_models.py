@@ -1,5 +1,6 @@
 """Test models."""
 
+from django.db import IntegrityError
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from battery import models
@@ -73,4 +74,14 @@ class ModelTests(TestCase):
             user=user,
             name="Cucumber",
         )
-        self.assertEqual(str(ingredient), ingredient.name)
\ No newline at end of file
+        self.assertEqual(str(ingredient), ingredient.name)
+
+    def test_tag_name_unique_per_user(self):
+        """ Test a user cannot have two tags with the same name."""
+        user = create_user()
+        models.Tag.objects.create(user=user, name="Vegan")
+        models.Tag.objects.create(user=create_user(), name="Vegan")
+
+        with self.assertRaises(IntegrityError):
+            models.Tag.objects.create(user=user, name="Vegan")
+
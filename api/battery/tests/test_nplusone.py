@@ -0,0 +1,126 @@
+"""Tests for the N+1 query detector and the query budget assertion."""
+
+from datetime import timedelta
+from itertools import cycle
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from battery.models import EnergyRollup, Recipe, Tag
+from battery.nplusone import NPlusOneError, QueryShapeTracker, shape
+from battery.testing import QueryBudgetMixin
+from battery.tests.test_models import create_user
+from recipe.serializers import RecipeSerializer
+
+RECIPE_URL = reverse("recipe:recipe-list")
+BULK_URL = "/api/energy-journal/bulk/"
+
+
+def create_recipes(user, count):
+    """Create recipes with one tag each."""
+    for i in range(count):
+        recipe = Recipe.objects.create(user=user, title=f"Recipe {i}", time_minutes=5)
+        recipe.tags.add(Tag.objects.create(user=user, name=f"Tag {i}"))
+
+
+class QueryShapeTrackerTests(TestCase):
+    """Test spotting repeated query shapes."""
+
+    def setUp(self):
+        self.user = create_user()
+        create_recipes(self.user, 4)
+
+    def test_shape_collapses_in_lists(self):
+        """Test statements differing only in the length of an IN list share a shape."""
+        self.assertEqual(
+            shape('SELECT 1 WHERE "id" IN (%s, %s, %s)'),
+            shape('SELECT 1 WHERE "id" IN (%s)'),
+        )
+
+    def test_reports_serializer_field(self):
+        """Test serializing without a prefetch is reported against the field."""
+        tracker = QueryShapeTracker(threshold=3)
+        with connection.execute_wrapper(tracker):
+            data = RecipeSerializer(Recipe.objects.filter(user=self.user), many=True).data
+
+        self.assertEqual(len(data), 4)
+        repeated = tracker.repeated()
+        sources = [source for _, _, source in repeated]
+        self.assertIn(4, [count for _, count, _ in repeated])
+        self.assertTrue(any(source.startswith("RecipeSerializer.tags") for source in sources))
+        self.assertTrue(any("battery/tests/test_nplusone.py" in source for source in sources))
+
+    def test_prefetch_is_not_reported(self):
+        """Test a prefetched relation executes each shape once."""
+        tracker = QueryShapeTracker(threshold=2)
+        recipes = Recipe.objects.filter(user=self.user).prefetch_related(
+            "tags", "ingredients"
+        )
+        with connection.execute_wrapper(tracker):
+            data = RecipeSerializer(recipes, many=True).data
+
+        self.assertEqual(len(data), 4)
+        self.assertEqual(tracker.repeated(), [])
+
+
+@override_settings(NPLUSONE_DETECTION=True, FAST_LIST_SERIALIZATION=False)
+class NPlusOneMiddlewareTests(QueryBudgetMixin, TestCase):
+    """Test requests repeating queries are reported."""
+
+    def setUp(self):
+        self.user = create_user()
+        create_recipes(self.user, 4)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def unprefetched(self):
+        return patch(
+            "recipe.views.RecipeViewSet.get_queryset",
+            lambda view: Recipe.objects.filter(user=self.user),
+        )
+
+    @override_settings(NPLUSONE_RAISE=False)
+    def test_logs_repeated_queries(self):
+        """Test a request querying per recipe is logged with its origin."""
+        with self.unprefetched(), self.assertLogs("battery.nplusone", "WARNING") as logs:
+            self.client.get(RECIPE_URL)
+
+        self.assertIn("RecipeSerializer.tags", logs.output[0])
+
+    @override_settings(NPLUSONE_RAISE=True)
+    def test_raises_when_enabled(self):
+        """Test NPLUSONE_RAISE fails the request."""
+        with self.unprefetched(), self.assertRaises(NPlusOneError):
+            self.client.get(RECIPE_URL)
+
+    @override_settings(NPLUSONE_RAISE=True)
+    def test_prefetched_list_passes(self):
+        """Test the recipe list itself does not repeat queries."""
+        with self.assertMaxQueries(3):
+            self.client.get(RECIPE_URL)
+
+    @override_settings(NPLUSONE_RAISE=True, ENERGY_BULK_BATCH_SIZE=2)
+    def test_repeated_writes_pass(self):
+        """Test a bulk ingest updating a rollup per day is not reported."""
+        days = cycle([timezone.now() - timedelta(days=day) for day in range(5)])
+        payload = [{"wellbeing": 5, "mental_stress": 5, "physical_stress": 5}] * 10
+
+        with patch("django.utils.timezone.now", side_effect=lambda: next(days)):
+            res = self.client.post(BULK_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertGreaterEqual(
+            EnergyRollup.objects.filter(user=self.user, bucket=EnergyRollup.DAY).count(),
+            3,
+        )
+
+    def test_assert_max_queries_fails_over_budget(self):
+        """Test the budget assertion fails when more queries run than allowed."""
+        with self.assertRaises(AssertionError), self.assertMaxQueries(1):
+            list(Recipe.objects.all())
+            list(Tag.objects.all())
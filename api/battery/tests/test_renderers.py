@@ -0,0 +1,95 @@
+"""Tests for the orjson backed renderer and parser."""
+
+import uuid
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from io import BytesIO
+from unittest.mock import patch
+from zoneinfo import ZoneInfo
+
+from django.test import SimpleTestCase
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from battery.parsers import FastJSONParser
+from battery.renderers import FastJSONRenderer
+
+DOCUMENT = {
+    "utc": datetime(2024, 5, 1, 8, 30, 15, 123456, tzinfo=ZoneInfo("UTC")),
+    "local": datetime(2024, 5, 1, 8, 30, tzinfo=ZoneInfo("Australia/Sydney")),
+    "naive": datetime(2024, 5, 1, 8, 30),
+    "date": date(2024, 5, 1),
+    "time": time(8, 30),
+    "duration": timedelta(minutes=90),
+    "decimal": Decimal("12.50"),
+    "uuid": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+    "text": "caf\u00e9 \u2028 \u2029 \U0001f34e",
+    "numbers": [0, -1, 2.5, 1 / 3, True, None],
+    "nested": {1: "int key", "tuple": (1, 2)},
+}
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    """Test the orjson renderer matches DRF's JSONRenderer byte for byte."""
+
+    def test_matches_stdlib_renderer(self):
+        """Test dates, decimals and escapes render exactly like the stdlib."""
+        self.assertEqual(
+            FastJSONRenderer().render(DOCUMENT), JSONRenderer().render(DOCUMENT)
+        )
+
+    def test_indent_matches_stdlib_renderer(self):
+        """Test an indented response is rendered like the stdlib."""
+        media_type = "application/json; indent=4"
+
+        self.assertEqual(
+            FastJSONRenderer().render(DOCUMENT, media_type),
+            JSONRenderer().render(DOCUMENT, media_type),
+        )
+
+    def test_unsupported_values_fall_back_to_stdlib(self):
+        """Test values orjson cannot encode are left to the stdlib."""
+        data = {"big": 2**70}
+
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        with self.assertRaises(TypeError):
+            FastJSONRenderer().render({"object": object()})
+
+    def test_renders_without_orjson(self):
+        """Test the renderer falls back to the stdlib when orjson is missing."""
+        with patch("battery.renderers.orjson", None):
+            rendered = FastJSONRenderer().render(DOCUMENT)
+
+        self.assertEqual(rendered, JSONRenderer().render(DOCUMENT))
+
+
+class FastJSONParserTests(SimpleTestCase):
+    """Test the orjson parser matches DRF's JSONParser."""
+
+    def parse(self, parser, body):
+        return parser.parse(BytesIO(body), "application/json", {})
+
+    def test_matches_stdlib_parser(self):
+        """Test a document parses to the same data as with the stdlib."""
+        body = '{"a": [1, 2.5, "caf\\u00e9", null, true], "b": {"c": 100000000000000000000}}'
+
+        self.assertEqual(
+            self.parse(FastJSONParser(), body.encode()),
+            self.parse(JSONParser(), body.encode()),
+        )
+
+    def test_invalid_json(self):
+        """Test invalid documents fail with the stdlib error message."""
+        for body in (b'{"a": }', b"[NaN]"):
+            with self.assertRaises(ParseError) as fast:
+                self.parse(FastJSONParser(), body)
+            with self.assertRaises(ParseError) as stdlib:
+                self.parse(JSONParser(), body)
+
+            self.assertEqual(str(fast.exception), str(stdlib.exception))
+
+    def test_parses_without_orjson(self):
+        """Test the parser falls back to the stdlib when orjson is missing."""
+        with patch("battery.parsers.orjson", None):
+            self.assertEqual(self.parse(FastJSONParser(), b'{"a": 1}'), {"a": 1})
@@ -1,16 +1,53 @@
 
 # Create your views here.
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from rest_framework.response import Response
-from rest_framework.decorators import api_view
+from rest_framework.decorators import (
+    api_view,
+    authentication_classes,
+    parser_classes,
+    permission_classes,
+)
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
+from user.authentication import API_AUTHENTICATION_CLASSES
 
-from .models import Energy
-from .serializers import EnergySerializer
+from . import exports, rollups, sync
+from .fastpath import RowRenderer
+from .models import Energy, EnergyRollup, Tombstone
+from .pagination import EnergyKeysetPagination
+from .parsers import FastJSONParser, NDJSONParser
+from .serializers import (
+    EnergyExportFilterSerializer,
+    EnergyRollupSerializer,
+    EnergySerializer,
+)
 
 @api_view(['GET', 'POST'])
+@authentication_classes(API_AUTHENTICATION_CLASSES)
+@permission_classes([IsAuthenticated])
 def energy_journal(request):
     if request.method == 'GET':
-        data = Energy.objects.all()
+        data = Energy.objects.filter(user=request.user).order_by("date_added", "id")
+
+        paginator = EnergyKeysetPagination()
+        if settings.FAST_LIST_SERIALIZATION:
+            renderer = RowRenderer(EnergySerializer(context={'request': request}))
+            if paginator.is_requested(request):
+                page = paginator.paginate_queryset(renderer.values(data), request)
+                return paginator.get_paginated_response(renderer.render(page))
+            return Response(renderer.render(renderer.values(data)))
+
+        if paginator.is_requested(request):
+            page = paginator.paginate_queryset(data, request)
+            serializer = EnergySerializer(page, context={'request': request}, many=True)
+            return paginator.get_paginated_response(serializer.data)
 
         serializer = EnergySerializer(data, context={'request': request}, many=True)
 
@@ -19,15 +56,17 @@ def energy_journal(request):
     elif request.method == 'POST':
         serializer = EnergySerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save()
-            return Response(status=status.HTTP_201_CREATED)
+            serializer.save(user=request.user)
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 @api_view(['PUT', 'DELETE'])
+@authentication_classes(API_AUTHENTICATION_CLASSES)
+@permission_classes([IsAuthenticated])
 def energy_detail(request, pk):
     try:
-        energy = Energy.objects.get(pk=pk)
+        energy = Energy.objects.get(pk=pk, user=request.user)
     except Energy.DoesNotExist:
         return Response(status=status.HTTP_404_NOT_FOUND)
 
@@ -35,9 +74,170 @@ def energy_detail(request, pk):
         serializer = EnergySerializer(energy, data=request.data,context={'request': request})
         if serializer.is_valid():
             serializer.save()
-            return Response(status=status.HTTP_204_NO_CONTENT)
+            return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     elif request.method == 'DELETE':
         energy.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+@api_view(['POST'])
+@authentication_classes(API_AUTHENTICATION_CLASSES)
+@permission_classes([IsAuthenticated])
+@parser_classes([FastJSONParser, NDJSONParser])
+def energy_bulk(request):
+    """
+    Creates many energy entries from a JSON array or an NDJSON stream.
+
+    Explanation:
+    Every item is validated against the EnergySerializer rules with a single serializer
+    instance. Valid items are inserted with bulk_create in chunks of
+    ENERGY_BULK_BATCH_SIZE inside one transaction, while invalid items are reported by
+    their position without preventing the valid ones from being saved.
+
+    Args:
+        request: The incoming request holding a list of energy entries.
+
+    Returns:
+        Response: The ids of the created entries and the errors of rejected items.
+    """
+    items = request.data
+    if not isinstance(items, list):
+        return Response(
+            {"detail": "Expected a list of items."}, status=status.HTTP_400_BAD_REQUEST
+        )
+    if len(items) > settings.ENERGY_BULK_MAX_ROWS:
+        return Response(
+            {"detail": f"Cannot ingest more than {settings.ENERGY_BULK_MAX_ROWS} items."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    serializer = EnergySerializer(context={'request': request})
+    entries = []
+    errors = []
+    for index, item in enumerate(items):
+        try:
+            validated_data = serializer.run_validation(item)
+        except ValidationError as exc:
+            errors.append({"index": index, "errors": exc.detail})
+        else:
+            entries.append(Energy(user=request.user, **validated_data))
+
+    with transaction.atomic():
+        created = Energy.objects.bulk_create(
+            entries, batch_size=settings.ENERGY_BULK_BATCH_SIZE
+        )
+        # bulk_create sends no signals, so fold the batch into the rollups here.
+        rollups.apply_changes(added=created)
+
+    if errors and not created:
+        response_status = status.HTTP_400_BAD_REQUEST
+    else:
+        response_status = status.HTTP_201_CREATED
+    return Response(
+        {"created": [energy.pk for energy in created], "errors": errors},
+        status=response_status,
+    )
+
+
+@api_view(['GET'])
+@authentication_classes(API_AUTHENTICATION_CLASSES)
+@permission_classes([IsAuthenticated])
+def energy_rollups(request):
+    """
+    Lists average energy scores per day or per week for the authenticated user.
+
+    Args:
+        request: The incoming request, with an optional bucket of "day" or "week".
+
+    Returns:
+        Response: One row per bucket ordered by its start date.
+    """
+    bucket = request.query_params.get("bucket", EnergyRollup.DAY)
+    if bucket not in (EnergyRollup.DAY, EnergyRollup.WEEK):
+        return Response(
+            {"bucket": ['Expected "day" or "week".']},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    data = EnergyRollup.objects.filter(user=request.user, bucket=bucket).order_by(
+        "period_start"
+    )
+    serializer = EnergyRollupSerializer(data, many=True)
+    return Response(serializer.data)
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+EXPORT_FORMATS = {
+    "csv": (exports.csv_lines, "text/csv"),
+    "ndjson": (exports.ndjson_lines, "application/x-ndjson"),
+}
+
+
+@api_view(['GET'])
+@authentication_classes(API_AUTHENTICATION_CLASSES)
+@permission_classes([IsAuthenticated])
+def energy_export(request, export_format):
+    """
+    Streams the authenticated user's journal as CSV or NDJSON.
+
+    Explanation:
+    Rows are read through a server-side cursor in chunks of ENERGY_EXPORT_CHUNK_SIZE and
+    encoded one at a time, so memory stays flat however large the journal is and the
+    first bytes are sent as soon as the first chunk arrives.
+
+    Args:
+        request: The incoming request, with optional start and end dates (inclusive).
+        export_format (str): Either "csv" or "ndjson".
+
+    Returns:
+        StreamingHttpResponse: The exported journal as a file attachment.
+    """
+    filters = EnergyExportFilterSerializer(data=request.query_params)
+    if not filters.is_valid():
+        return Response(filters.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    data = Energy.objects.filter(user=request.user)
+    start, end = filters.validated_data.get("start"), filters.validated_data.get("end")
+    if start:
+        data = data.filter(date_added__gte=_start_of_day(start))
+    if end:
+        data = data.filter(date_added__lt=_start_of_day(end + timedelta(days=1)))
+
+    values = data.order_by("date_added", "id").values_list(*exports.EXPORT_FIELDS)
+    encode, content_type = EXPORT_FORMATS[export_format]
+    response = StreamingHttpResponse(
+        encode(values.iterator(chunk_size=settings.ENERGY_EXPORT_CHUNK_SIZE)),
+        content_type=content_type,
+    )
+    response["Content-Disposition"] = (
+        f'attachment; filename="energy-journal.{export_format}"'
+    )
+    return response
+
+
+@api_view(['GET'])
+@authentication_classes(API_AUTHENTICATION_CLASSES)
+@permission_classes([IsAuthenticated])
+def energy_changes(request):
+    """
+    Lists the entries created, updated or deleted since the client's last sync.
+
+    Args:
+        request: The incoming request, with an optional since cursor from a previous sync.
+
+    Returns:
+        Response: The next cursor, the changed entries, the ids of deleted entries and
+        whether the client must replace its copy.
+    """
+    cursor, data, deleted, reset = sync.changes_since(
+        request, Energy.objects.filter(user=request.user), Tombstone.ENERGY
+    )
+    serializer = EnergySerializer(data.order_by("date_added", "id"), many=True)
+    return Response(
+        {"cursor": cursor, "changed": serializer.data, "deleted": deleted, "reset": reset}
+    )
@@ -0,0 +1,54 @@
+"""
+Gunicorn configuration for serving the API in production.
+
+Every setting can be overridden with a GUNICORN_* environment variable. Send SIGHUP to
+the master process to reload gracefully: new workers start with fresh code and the old
+ones finish their in-flight requests before exiting.
+"""
+
+import multiprocessing
+import os
+
+wsgi_app = os.getenv("GUNICORN_APP", "api.wsgi:application")
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+
+# One process per core plus one, each with a few threads to overlap database waits.
+# For ASGI, set GUNICORN_APP=api.asgi:application and
+# GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker with uvicorn installed.
+# Throttles, cached tokens and revocations live in the Django cache, which processes
+# only share when CACHE_URL is set, so without it the API is served by one process.
+if os.getenv("CACHE_URL"):
+    workers = int(os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+else:
+    workers = int(os.getenv("GUNICORN_WORKERS", "1"))
+    if workers > 1:
+        raise RuntimeError("Set CACHE_URL to a shared cache to run more than one worker.")
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+
+# Each thread keeps its own persistent database connection (DB_CONN_MAX_AGE), so the
+# server can hold workers * threads connections. PostgreSQL allows 100 by default, and
+# migrations, the admin and other servers need some too, so workers are reduced to stay
+# within GUNICORN_MAX_DB_CONNECTIONS.
+max_db_connections = int(os.getenv("GUNICORN_MAX_DB_CONNECTIONS", "80"))
+threads = min(threads, max_db_connections)
+workers = max(1, min(workers, max_db_connections // threads))
+
+# Keep client connections open between requests from a load balancer.
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+
+# Recycle workers now and then so slow leaks cannot build up, staggered by the jitter.
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "1000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "100"))
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")
+errorlog = os.getenv("GUNICORN_ERROR_LOG", "-")
+
+
+def worker_exit(server, worker):
+    # Hand the requests recorded since the last metrics flush to the shared totals.
+    from battery.metrics import registry
+
+    registry.flush()
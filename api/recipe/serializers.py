@@ -1,4 +1,6 @@
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+from battery import autocomplete, search
 from battery.models import Recipe, Tag, Ingredient
 
 
@@ -9,6 +11,13 @@ class IngredientSerializer(serializers.ModelSerializer):
         read_only_fields = ("id",)
 
 
+class IngredientUsageSerializer(IngredientSerializer):
+    usage = serializers.IntegerField(read_only=True)
+
+    class Meta(IngredientSerializer.Meta):
+        fields = IngredientSerializer.Meta.fields + ["usage"]
+
+
 class TagSerializer(serializers.ModelSerializer):
     """
     Serializer class for serializing Tag instances.
@@ -28,7 +37,82 @@ class TagSerializer(serializers.ModelSerializer):
         read_only_fields = ("id",)
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class TagUsageSerializer(TagSerializer):
+    """
+    Serializer class for a Tag annotated with the number of recipes using it.
+
+    Attributes:
+        usage (int): The number of the user's recipes the tag is assigned to.
+    """
+
+    usage = serializers.IntegerField(read_only=True)
+
+    class Meta(TagSerializer.Meta):
+        fields = TagSerializer.Meta.fields + ["usage"]
+
+
+class SparseFieldsMixin:
+    """
+    Serializer mixin rendering only the fields a read request asks for.
+
+    Explanation:
+    ?fields= names the fields to render. Once it is given, the nested relations listed in
+    expandable_fields are left out unless also named there or in ?expand=. Without
+    ?fields= every field is rendered as before. Write requests always use every field so
+    validation is unaffected.
+
+    Attributes:
+        expandable_fields (tuple): The nested relations that can be expanded.
+    """
+
+    expandable_fields = ("tags", "ingredients")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if request is None or request.method not in SAFE_METHODS:
+            return
+        requested = self.requested_fields(request.query_params)
+        for name in set(self.fields).difference(requested):
+            self.fields.pop(name)
+
+    @classmethod
+    def requested_fields(cls, query_params):
+        """
+        Resolves the fields to render from the request's query parameters.
+
+        Args:
+            query_params: The query parameters of the request.
+
+        Returns:
+            list: The names of the fields to render, in their declared order.
+
+        Raises:
+            ValidationError: If an unknown field or relation is named.
+        """
+        fields = list(cls.Meta.fields)
+        requested = cls._split(query_params.get("fields"))
+        expand = cls._split(query_params.get("expand"))
+        unknown = requested.difference(fields)
+        if unknown:
+            raise serializers.ValidationError(
+                {"fields": [f"Unknown fields: {', '.join(sorted(unknown))}."]}
+            )
+        unknown = expand.difference(cls.expandable_fields)
+        if unknown:
+            raise serializers.ValidationError(
+                {"expand": [f"Unknown relations: {', '.join(sorted(unknown))}."]}
+            )
+        if not requested:
+            return fields
+        return [field for field in fields if field in requested or field in expand]
+
+    @staticmethod
+    def _split(value):
+        return {name.strip() for name in (value or "").split(",") if name.strip()}
+
+
+class RecipeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for the Recipe model allowing all fields to be serialized and setting 'id' as read-only.
 
@@ -60,9 +144,10 @@ class RecipeSerializer(serializers.ModelSerializer):
         """Create a recipe."""
         tags = validated_data.pop("tags", [])
         ingredients = validated_data.pop("ingredients", [])
-        recipe = Recipe.objects.create(**validated_data)
-        self._get_or_create_tags(tags, recipe)
-        self._get_or_create_ingredients(ingredients, recipe)
+        with search.deferred_refresh():
+            recipe = Recipe.objects.create(**validated_data)
+            self._get_or_create_tags(tags, recipe)
+            self._get_or_create_ingredients(ingredients, recipe)
 
         return recipe
 
@@ -70,28 +155,58 @@ class RecipeSerializer(serializers.ModelSerializer):
         """Update recipe."""
         tags = validated_data.pop("tags", None)
         ingredients = validated_data.pop("ingredients", None)
-        if tags is not None:
-            instance.tags.clear()
-            self._get_or_create_tags(tags, instance)
-        if ingredients is not None:
-            instance.ingredients.clear()
-            self._get_or_create_ingredients(ingredients, instance)
-
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-
-        instance.save()
+        with search.deferred_refresh():
+            # set() diffs against the stored links, deleting only removed ones and
+            # inserting only added ones, so relations that did not change are never
+            # written.
+            if tags is not None:
+                self._get_or_create_tags(tags, instance)
+            if ingredients is not None:
+                self._get_or_create_ingredients(ingredients, instance)
+
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+
+            instance.save()
         return instance
 
     def _get_or_create_ingredients(self, ingredients, recipe):
-        for ingredient_data in ingredients:
-            ingredient, _ = Ingredient.objects.get_or_create(user=self.context['request'].user,**ingredient_data)
-            recipe.ingredients.add(ingredient)
+        recipe.ingredients.set(self._get_or_create_attrs(Ingredient, ingredients))
 
     def _get_or_create_tags(self, tags, recipe):
-        for tag_data in tags:
-            tag, _ = Tag.objects.get_or_create(user=self.context['request'].user, **tag_data)
-            recipe.tags.add(tag)
+        recipe.tags.set(self._get_or_create_attrs(Tag, tags))
+
+    def _get_or_create_attrs(self, model, items):
+        """
+        Returns the user's tags or ingredients with the given names, creating missing ones.
+
+        Explanation:
+        Existing rows are read in one query. Any missing names are inserted in a single
+        statement that skips names created meanwhile, relying on the unique (user, name)
+        constraint, and read back in one more query. Concurrent writers therefore never
+        duplicate a name, and a payload naming only existing rows performs no writes.
+
+        Args:
+            model: Either Tag or Ingredient.
+            items (list): The validated tag or ingredient data.
+
+        Returns:
+            list: The matching model instances.
+        """
+        user = self.context["request"].user
+        names = list(dict.fromkeys(item["name"] for item in items))
+        if not names:
+            return []
+        found = list(model.objects.filter(user=user, name__in=names))
+        missing = set(names).difference(obj.name for obj in found)
+        if missing:
+            model.objects.bulk_create(
+                [model(user=user, name=name) for name in missing], ignore_conflicts=True
+            )
+            # bulk_create sends no signals, so refresh autocomplete here.
+            autocomplete.invalidate(model, user.id)
+            found.extend(model.objects.filter(user=user, name__in=missing))
+        return found
 
 
 class RecipeDetailSerializer(RecipeSerializer):
@@ -107,3 +222,20 @@ class RecipeDetailSerializer(RecipeSerializer):
 
     class Meta(RecipeSerializer.Meta):
         fields = RecipeSerializer.Meta.fields + ["description"]
+
+
+class CookableRecipeSerializer(RecipeSerializer):
+    """
+    A serializer class for ranking a recipe against a pantry, extending the base RecipeSerializer.
+
+    Attributes:
+        missing_ingredients (list): The ids of the recipe's ingredients absent from the pantry.
+    """
+
+    missing_ingredients = serializers.ListField(
+        child=serializers.IntegerField(), read_only=True
+    )
+
+    class Meta(RecipeSerializer.Meta):
+        fields = RecipeSerializer.Meta.fields + ["missing_ingredients"]
+
@@ -15,6 +15,7 @@ from battery.models import (
 )
 
 from recipe.serializers import IngredientSerializer
+from battery.testing import QueryBudgetMixin
 from battery.tests.test_models import create_user
 
 INGREDIENTS_URL = reverse("recipe:ingredient-list")
@@ -37,7 +38,7 @@ class PublicIngredientsApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
-class PrivateIngredientsApiTests(TestCase):
+class PrivateIngredientsApiTests(QueryBudgetMixin, TestCase):
     """Test the privately available ingredients API"""
 
     def setUp(self):
@@ -57,6 +58,17 @@ class PrivateIngredientsApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
 
+    def test_list_assigned_only_query_budget(self):
+        """Test filtering assigned ingredients does not query per ingredient."""
+        for i in range(5):
+            recipe = Recipe.objects.create(user=self.user, title=f"Recipe {i}", time_minutes=5)
+            recipe.ingredients.add(Ingredient.objects.create(user=self.user, name=f"Item {i}"))
+
+        with self.assertMaxQueries(1):
+            res = self.client.get(INGREDIENTS_URL, {"assigned_only": 1})
+
+        self.assertEqual(len(res.data), 5)
+
     def test_ingredients_limited_to_user(self):
         """Test that ingredients for the authenticated user are returned"""
         user2 = create_user()
@@ -90,3 +102,16 @@ class PrivateIngredientsApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
         ingredients = Ingredient.objects.filter(user=self.user)
         self.assertFalse(ingredients.exists())
+
+    def test_filter_ingredients_assigned_to_recipes(self):
+        """Test listing only ingredients assigned to recipes, without duplicates"""
+        eggs = Ingredient.objects.create(user=self.user, name="Eggs")
+        Ingredient.objects.create(user=self.user, name="Turkey")
+        for title in ("Omelette", "Scrambled eggs"):
+            recipe = Recipe.objects.create(user=self.user, title=title, time_minutes=5)
+            recipe.ingredients.add(eggs)
+
+        res = self.client.get(INGREDIENTS_URL, {"assigned_only": 1, "order": "usage"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [{"id": eggs.id, "name": "Eggs", "usage": 2}])
@@ -1,14 +1,23 @@
+from unittest.mock import patch
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework import status
 from rest_framework.test import APIClient
+from battery import pantry
+from battery.testing import QueryBudgetMixin
 from battery.models import Recipe, Tag, Ingredient
 from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
 import factory
 
 RECIPE_URL = reverse("recipe:recipe-list")
+CHANGES_URL = reverse("recipe:recipe-changes")
+COOKABLE_URL = reverse("recipe:recipe-cookable")
 
 
 class RecipeFactory(factory.django.DjangoModelFactory):
@@ -47,7 +56,7 @@ class PublicRecipeAPITests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
-class PrivateRecipeAPITests(TestCase):
+class PrivateRecipeAPITests(QueryBudgetMixin, TestCase):
     """Test the private recipe API."""
 
     def assert_serializer_equals_response(self, recipes, res):
@@ -314,3 +323,490 @@ class PrivateRecipeAPITests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(recipe.ingredients.count(), 0)
 
+    def create_recipe_with_relations(self):
+        recipe = self.create_recipe()
+        recipe.tags.add(Tag.objects.create(user=self.user, name=f"Tag {recipe.id}"))
+        recipe.ingredients.add(
+            Ingredient.objects.create(user=self.user, name=f"Ingredient {recipe.id}")
+        )
+        return recipe
+
+    def test_list_query_count_is_constant(self):
+        """Test listing recipes costs the same queries however many there are."""
+        self.create_recipe_with_relations()
+        with self.assertNumQueries(3):
+            self.client.get(RECIPE_URL)
+
+        for _ in range(5):
+            self.create_recipe_with_relations()
+        with self.assertNumQueries(3):
+            res = self.client.get(RECIPE_URL)
+
+        recipes = Recipe.objects.filter(user=self.user).order_by("-id")
+        self.assert_serializer_equals_response(recipes, res)
+
+    def test_create_recipe_query_budget(self):
+        """Test creating a recipe with several tags and ingredients stays within budget."""
+        payload = {
+            "title": "Stew",
+            "time_minutes": 60,
+            "tags": [{"name": f"Tag {i}"} for i in range(5)],
+            "ingredients": [{"name": f"Ingredient {i}"} for i in range(5)],
+        }
+
+        with self.assertMaxQueries(18):
+            res = self.client.post(RECIPE_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data["tags"]), 5)
+
+    def test_detail_query_count(self):
+        """Test retrieving a recipe prefetches its tags and ingredients."""
+        recipe = self.create_recipe_with_relations()
+
+        with self.assertNumQueries(3):
+            res = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(res.data, RecipeDetailSerializer(recipe).data)
+
+    def test_list_sparse_fields(self):
+        """Test ?fields= renders and loads only the requested columns."""
+        recipe = self.create_recipe_with_relations()
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(RECIPE_URL, {"fields": "id,title"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [{"id": recipe.id, "title": recipe.title}])
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"time_minutes"', queries[0]["sql"])
+
+    def test_list_sparse_fields_with_expand(self):
+        """Test ?expand= adds a nested relation, prefetching only that one."""
+        recipe = self.create_recipe_with_relations()
+
+        with self.assertNumQueries(2):
+            res = self.client.get(RECIPE_URL, {"fields": "title", "expand": "tags"})
+
+        tags = [{"id": tag.id, "name": tag.name} for tag in recipe.tags.all()]
+        self.assertEqual(res.data, [{"title": recipe.title, "tags": tags}])
+
+    def test_detail_sparse_fields(self):
+        """Test ?fields= applies to retrieving a single recipe."""
+        recipe = self.create_recipe_with_relations()
+
+        res = self.client.get(detail_url(recipe.id), {"fields": "description"})
+
+        self.assertEqual(res.data, {"description": recipe.description})
+
+    def test_unknown_sparse_fields(self):
+        """Test naming unknown fields or relations is rejected."""
+        for params in ({"fields": "id,secret"}, {"fields": "id", "expand": "title"}):
+            res = self.client.get(RECIPE_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_sparse_fields_ignored_on_write(self):
+        """Test ?fields= does not prune the fields a write accepts."""
+        recipe = self.create_recipe()
+
+        res = self.client.patch(
+            f"{detail_url(recipe.id)}?fields=id", {"time_minutes": 7}, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.time_minutes, 7)
+
+    def test_fast_list_matches_serializer(self):
+        """Test the .values() fast path renders recipe lists byte for byte."""
+        for _ in range(3):
+            recipe = self.create_recipe_with_relations()
+        tag = Tag.objects.create(user=self.user, name="Shared")
+        recipe.tags.add(tag)
+        self.create_recipe()
+
+        for params in (
+            {},
+            {"fields": "id,title"},
+            {"fields": "title", "expand": "ingredients"},
+            {"tags": tag.id},
+            {"q": recipe.title},
+        ):
+            slow = self.client.get(RECIPE_URL, params)
+            with override_settings(FAST_LIST_SERIALIZATION=True):
+                fast = self.client.get(RECIPE_URL, params)
+
+            self.assertEqual(fast.status_code, status.HTTP_200_OK)
+            self.assertEqual(fast.content, slow.content, params)
+
+    @override_settings(FAST_LIST_SERIALIZATION=True)
+    def test_fast_list_query_count(self):
+        """Test the fast path reads rows and each requested relation once."""
+        for _ in range(3):
+            self.create_recipe_with_relations()
+
+        with self.assertNumQueries(3):
+            self.client.get(RECIPE_URL)
+        with self.assertNumQueries(1):
+            self.client.get(RECIPE_URL, {"fields": "id,title"})
+
+    def count_create_queries(self, total):
+        payload = factory.build(
+            dict,
+            FACTORY_CLASS=RecipeFactory,
+            tags=[{"name": f"Tag {i}"} for i in range(total)],
+            ingredients=[{"name": f"Ingredient {i}"} for i in range(total)],
+        )
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(RECIPE_URL, payload, format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        return len(queries)
+
+    def test_create_query_count_is_constant(self):
+        """Test creating a recipe costs the same queries however many tags it has."""
+        self.assertEqual(self.count_create_queries(1), self.count_create_queries(30))
+
+    def test_create_recipe_with_repeated_tag_names(self):
+        """Test repeated names in a payload resolve to a single tag."""
+        Tag.objects.create(user=self.user, name="Existing")
+        payload = factory.build(
+            dict,
+            FACTORY_CLASS=RecipeFactory,
+            tags=[{"name": "Existing"}, {"name": "New"}, {"name": "New"}],
+        )
+
+        res = self.client.post(RECIPE_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipe = Recipe.objects.get(id=res.data["id"])
+        self.assertEqual(
+            sorted(recipe.tags.values_list("name", flat=True)), ["Existing", "New"]
+        )
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+
+    def capture_update_writes(self, recipe, payload):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.patch(detail_url(recipe.id), payload, format="json")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [
+            query["sql"]
+            for query in queries
+            if query["sql"].startswith(("INSERT", "UPDATE", "DELETE"))
+        ]
+
+    def test_unchanged_relations_are_not_written(self):
+        """Test resubmitting the same tags and ingredients writes no links."""
+        recipe = self.create_recipe_with_relations()
+        payload = {
+            "title": "Fixed typo",
+            "tags": [{"name": tag.name} for tag in recipe.tags.all()],
+            "ingredients": [{"name": i.name} for i in recipe.ingredients.all()],
+        }
+
+        writes = self.capture_update_writes(recipe, payload)
+
+        # The recipe row itself, then its refreshed search vector.
+        self.assertEqual(len(writes), 2)
+        self.assertTrue(writes[0].startswith('UPDATE "battery_recipe" SET "user_id"'))
+        self.assertTrue(writes[1].startswith('UPDATE "battery_recipe" SET "search_vector"'))
+
+    def test_create_refreshes_search_vector_once(self):
+        """Test creating a recipe with relations reindexes it in one UPDATE."""
+        payload = factory.build(
+            dict,
+            FACTORY_CLASS=RecipeFactory,
+            tags=[{"name": "Vegan"}],
+            ingredients=[{"name": "Lentils"}],
+        )
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(RECIPE_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        refreshes = [
+            query["sql"] for query in queries if '"search_vector" =' in query["sql"]
+        ]
+        self.assertEqual(len(refreshes), 1)
+        self.assertEqual(self.search("lentils"), [payload["title"]])
+
+    def test_changed_relations_write_only_the_delta(self):
+        """Test replacing one tag deletes and inserts only that link."""
+        recipe = self.create_recipe()
+        kept, dropped = (
+            Tag.objects.create(user=self.user, name=name) for name in ("Kept", "Dropped")
+        )
+        recipe.tags.add(kept, dropped)
+        added = Tag.objects.create(user=self.user, name="Added")
+
+        writes = self.capture_update_writes(
+            recipe, {"tags": [{"name": "Kept"}, {"name": "Added"}]}
+        )
+
+        link_writes = [
+            sql
+            for sql in writes
+            if sql.startswith(
+                ('DELETE FROM "battery_recipe_tags"', 'INSERT INTO "battery_recipe_tags"')
+            )
+        ]
+        self.assertEqual(len(link_writes), 2)
+        self.assertTrue(link_writes[0].startswith("DELETE"))
+        self.assertTrue(link_writes[1].startswith("INSERT"))
+        self.assertEqual(set(recipe.tags.all()), {kept, added})
+
+    def search(self, text):
+        res = self.client.get(RECIPE_URL, {"q": text})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [item["title"] for item in res.data]
+
+    def test_search_ranks_title_matches_first(self):
+        """Test full-text search ranks title matches above description matches."""
+        self.create_recipe(title="Tomato soup", description="Warming")
+        self.create_recipe(title="Pasta bake", description="Topped with tomato")
+        self.create_recipe(title="Green salad", description="Crunchy")
+        self.create_recipe(title="Tomato soup", user=self.create_user())
+
+        self.assertEqual(self.search("tomatoes"), ["Tomato soup", "Pasta bake"])
+
+    def test_search_tag_and_ingredient_names(self):
+        """Test search covers tag and ingredient names and follows renames."""
+        recipe = self.create_recipe(title="Curry", description="")
+        tag = Tag.objects.create(user=self.user, name="Vegan")
+        recipe.tags.add(tag)
+        recipe.ingredients.add(Ingredient.objects.create(user=self.user, name="Lentils"))
+
+        self.assertEqual(self.search("vegan"), ["Curry"])
+        self.assertEqual(self.search("lentil"), ["Curry"])
+
+        tag.name = "Spicy"
+        tag.save()
+        self.assertEqual(self.search("vegan"), [])
+        self.assertEqual(self.search("spicy"), ["Curry"])
+
+        tag.delete()
+        self.assertEqual(self.search("spicy"), [])
+
+    def test_search_falls_back_to_trigram_similarity(self):
+        """Test a misspelt search still finds recipes with a similar title."""
+        self.create_recipe(title="Spaghetti bolognese")
+        self.create_recipe(title="Chicken curry")
+
+        self.assertEqual(self.search("spagetti"), ["Spaghetti bolognese"])
+
+    def test_filter_by_tags_any_and_all(self):
+        """Test filtering recipes by tags in any and all match modes."""
+        vegan = Tag.objects.create(user=self.user, name="Vegan")
+        quick = Tag.objects.create(user=self.user, name="Quick")
+        both, vegan_only = self.create_recipe(), self.create_recipe()
+        self.create_recipe()
+        both.tags.add(vegan, quick)
+        vegan_only.tags.add(vegan)
+
+        res = self.client.get(RECIPE_URL, {"tags": f"{vegan.id},{quick.id}"})
+        self.assertEqual([item["id"] for item in res.data], [vegan_only.id, both.id])
+
+        res = self.client.get(
+            RECIPE_URL, {"tags": f"{vegan.id},{quick.id}", "match": "all"}
+        )
+        self.assertEqual([item["id"] for item in res.data], [both.id])
+
+    def test_filter_by_tags_and_ingredients(self):
+        """Test tag and ingredient filters combine in a single query."""
+        tag = Tag.objects.create(user=self.user, name="Dinner")
+        ingredient = Ingredient.objects.create(user=self.user, name="Rice")
+        match, tag_only = self.create_recipe(), self.create_recipe()
+        match.tags.add(tag)
+        match.ingredients.add(ingredient)
+        tag_only.tags.add(tag)
+
+        with self.assertNumQueries(3):
+            res = self.client.get(
+                RECIPE_URL, {"tags": str(tag.id), "ingredients": str(ingredient.id)}
+            )
+
+        self.assertEqual([item["id"] for item in res.data], [match.id])
+
+    def test_filter_invalid_ids(self):
+        """Test non numeric ids are rejected."""
+        res = self.client.get(RECIPE_URL, {"tags": "1,two"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filter_uses_link_table_indexes(self):
+        """Test the tag filter probes the link table's unique index per recipe."""
+        tags = Tag.objects.bulk_create(
+            Tag(user=self.user, name=f"Tag {i}") for i in range(50)
+        )
+        recipes = Recipe.objects.bulk_create(
+            Recipe(user=self.user, title=f"Recipe {i}", time_minutes=5)
+            for i in range(500)
+        )
+        Recipe.tags.through.objects.bulk_create(
+            Recipe.tags.through(recipe=recipe, tag=tags[(i + j) % len(tags)])
+            for i, recipe in enumerate(recipes)
+            for j in range(4)
+        )
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(RECIPE_URL, {"tags": str(tags[0].id), "match": "all"})
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE battery_recipe, battery_recipe_tags")
+            cursor.execute(f"EXPLAIN {queries[0]['sql']}")
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+
+        self.assertIn("battery_recipe_tags_recipe_id_tag_id", plan)
+        self.assertNotIn("Seq Scan on battery_recipe_tags", plan)
+
+
+class RecipeChangesApiTests(TransactionTestCase):
+    """
+    Test the recipe delta-sync feed.
+
+    Explanation:
+    The feed tells writes apart by transaction, so each request must commit on its own
+    rather than share the transaction TestCase wraps around a test.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = self.create_user()
+        self.client.force_authenticate(self.user)
+
+    def create_recipe(self, **params):
+        """Create and return a new recipe."""
+        defaults = factory.build(dict, FACTORY_CLASS=RecipeFactory) | params
+        return Recipe.objects.create(**{"user": self.user, **defaults})
+
+    def create_user(self):
+        """Create and return a new user."""
+        return get_user_model().objects.create_user(
+            **factory.build(dict, FACTORY_CLASS=UserFactory)
+        )
+
+    def test_recipe_changes_since_cursor(self):
+        """Test the recipe feed returns only recipes changed since the cursor."""
+        self.create_recipe()
+        edited = self.create_recipe()
+        removed = self.create_recipe()
+        self.create_recipe(user=self.create_user())
+        res = self.client.get(CHANGES_URL)
+        self.assertEqual(len(res.data["changed"]), 3)
+        cursor = res.data["cursor"]
+
+        self.client.patch(detail_url(edited.id), {"title": "Edited"})
+        self.client.delete(detail_url(removed.id))
+        res = self.client.get(CHANGES_URL, {"since": cursor})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        edited.refresh_from_db()
+        self.assertEqual(res.data["changed"], RecipeSerializer([edited], many=True).data)
+        self.assertEqual(res.data["deleted"], [removed.id])
+
+    def test_renaming_tag_resyncs_recipes(self):
+        """Test renaming a tag marks the recipes using it as changed."""
+        tag = Tag.objects.create(user=self.user, name="Tag")
+        recipe = self.create_recipe()
+        recipe.tags.add(tag)
+        cursor = self.client.get(CHANGES_URL).data["cursor"]
+
+        self.client.patch(reverse("recipe:tag-detail", args=[tag.id]), {"name": "New"})
+        res = self.client.get(CHANGES_URL, {"since": cursor})
+
+        self.assertEqual([item["id"] for item in res.data["changed"]], [recipe.id])
+        self.assertEqual(res.data["changed"][0]["tags"][0]["name"], "New")
+
+class PantryMatchingTests(TestCase):
+    """Test ranking recipes against a pantry of ingredients."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            **factory.build(dict, FACTORY_CLASS=UserFactory)
+        )
+        self.client.force_authenticate(self.user)
+        self.ingredients = {
+            name: Ingredient.objects.create(user=self.user, name=name)
+            for name in ("Rice", "Egg", "Onion", "Flour")
+        }
+
+    def create_recipe(self, *names):
+        recipe = Recipe.objects.create(
+            user=self.user, **factory.build(dict, FACTORY_CLASS=RecipeFactory)
+        )
+        recipe.ingredients.add(*(self.ingredients[name] for name in names))
+        return recipe
+
+    def pantry(self, *names):
+        return ",".join(str(self.ingredients[name].id) for name in names)
+
+    def test_rank_by_coverage(self):
+        """Test cookable recipes come first, then those missing fewest ingredients."""
+        missing_two = self.create_recipe("Rice", "Onion", "Flour")
+        cookable = self.create_recipe("Rice", "Egg")
+        missing_one = self.create_recipe("Egg", "Onion")
+        self.create_recipe("Flour")
+
+        res = self.client.get(COOKABLE_URL, {"pantry": self.pantry("Rice", "Egg")})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item["id"] for item in res.data],
+            [cookable.id, missing_one.id, missing_two.id],
+        )
+        self.assertEqual(res.data[0]["missing_ingredients"], [])
+        self.assertEqual(
+            res.data[1]["missing_ingredients"], [self.ingredients["Onion"].id]
+        )
+
+    def test_index_is_cached_and_invalidated(self):
+        """Test the index is reused until the user's recipes change."""
+        recipe = self.create_recipe("Rice", "Egg")
+        params = {"pantry": self.pantry("Rice")}
+
+        with patch("battery.pantry._build_index", wraps=pantry._build_index) as build:
+            self.client.get(COOKABLE_URL, params)
+            self.client.get(COOKABLE_URL, params)
+            self.assertEqual(build.call_count, 1)
+            with self.assertNumQueries(0):
+                pantry.get_index(self.user.id)
+
+            recipe.ingredients.remove(self.ingredients["Egg"])
+            res = self.client.get(COOKABLE_URL, params)
+            self.assertEqual(build.call_count, 2)
+
+        self.assertEqual(res.data[0]["missing_ingredients"], [])
+
+    def test_index_is_rebuilt_on_commit(self):
+        """Test an index cached while a change was uncommitted is retired on commit."""
+        recipe = self.create_recipe("Rice", "Egg")
+        params = {"pantry": self.pantry("Rice")}
+
+        with patch("battery.pantry._build_index", wraps=pantry._build_index) as build:
+            with self.captureOnCommitCallbacks() as callbacks:
+                recipe.ingredients.remove(self.ingredients["Egg"])
+            self.client.get(COOKABLE_URL, params)
+            self.assertEqual(build.call_count, 1)
+
+            for callback in callbacks:
+                callback()
+            res = self.client.get(COOKABLE_URL, params)
+            self.assertEqual(build.call_count, 2)
+
+        self.assertEqual(res.data[0]["missing_ingredients"], [])
+
+    def test_other_users_recipes_excluded(self):
+        """Test only the user's own recipes are ranked."""
+        other = get_user_model().objects.create_user(
+            **factory.build(dict, FACTORY_CLASS=UserFactory)
+        )
+        rice = Ingredient.objects.create(user=other, name="Rice")
+        recipe = Recipe.objects.create(
+            user=other, **factory.build(dict, FACTORY_CLASS=RecipeFactory)
+        )
+        recipe.ingredients.add(rice)
+
+        res = self.client.get(COOKABLE_URL, {"pantry": str(rice.id)})
+
+        self.assertEqual(res.data, [])
+
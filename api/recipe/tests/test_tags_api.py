@@ -1,12 +1,14 @@
 from rest_framework import status
 from rest_framework.test import APIClient
-from django.test import TestCase
-from battery.models import Tag
+from django.test import TestCase, override_settings
+from battery.models import Recipe, Tag
 from recipe.serializers import TagSerializer
 from django.urls import reverse
+from battery.testing import QueryBudgetMixin
 from battery.tests.test_models import create_user
 
 TAG_URL = reverse("recipe:tag-list")
+AUTOCOMPLETE_URL = reverse("recipe:tag-autocomplete")
 
 
 def detail_url(tag_id):
@@ -27,7 +29,7 @@ class PublicTagApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
-class PrivateTagsApiTests(TestCase):
+class PrivateTagsApiTests(QueryBudgetMixin, TestCase):
     """Test the authorized user tags API"""
 
     def setUp(self):
@@ -49,6 +51,17 @@ class PrivateTagsApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
 
+    def test_list_by_usage_query_budget(self):
+        """Test ordering tags by usage counts recipes in the same query."""
+        for i in range(5):
+            recipe = Recipe.objects.create(user=self.user, title=f"Recipe {i}", time_minutes=5)
+            recipe.tags.add(Tag.objects.create(user=self.user, name=f"Tag {i}"))
+
+        with self.assertMaxQueries(1):
+            res = self.client.get(TAG_URL, {"order": "usage"})
+
+        self.assertEqual(len(res.data), 5)
+
     def test_tags_limited_to_user(self):
         """Test that tags returned are for the current authenticated user"""
         user2 = create_user()
@@ -85,3 +98,106 @@ class PrivateTagsApiTests(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
         self.assertFalse(Tag.objects.filter(id=tag.id).exists())
+
+    def test_rename_tag_to_existing_name(self):
+        """Test renaming a tag to a name already in use is rejected"""
+        Tag.objects.create(user=self.user, name="Dessert")
+        tag = Tag.objects.create(user=self.user, name="After Dinner")
+
+        res = self.client.patch(detail_url(tag.id), {"name": "Dessert"})
+
+        tag.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(tag.name, "After Dinner")
+
+    def test_filter_tags_assigned_to_recipes(self):
+        """Test listing only tags assigned to at least one recipe"""
+        breakfast = Tag.objects.create(user=self.user, name="Breakfast")
+        Tag.objects.create(user=self.user, name="Lunch")
+        for title in ("Eggs", "Porridge"):
+            recipe = Recipe.objects.create(user=self.user, title=title, time_minutes=5)
+            recipe.tags.add(breakfast)
+
+        res = self.client.get(TAG_URL, {"assigned_only": 1})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [{"id": breakfast.id, "name": "Breakfast"}])
+
+    def test_order_tags_by_usage(self):
+        """Test ordering tags by how many recipes use them"""
+        tags = [Tag.objects.create(user=self.user, name=name) for name in "ABC"]
+        for title, used in (("Eggs", tags[1:]), ("Porridge", tags[2:])):
+            recipe = Recipe.objects.create(user=self.user, title=title, time_minutes=5)
+            recipe.tags.set(used)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(TAG_URL, {"order": "usage"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(tag["name"], tag["usage"]) for tag in res.data],
+            [("C", 2), ("B", 1), ("A", 0)],
+        )
+
+    def test_fast_list_matches_serializer(self):
+        """Test the .values() fast path renders tag lists byte for byte."""
+        tags = [Tag.objects.create(user=self.user, name=name) for name in "ABC"]
+        recipe = Recipe.objects.create(user=self.user, title="Eggs", time_minutes=5)
+        recipe.tags.set(tags[1:])
+
+        for params in ({}, {"order": "usage"}, {"assigned_only": 1}):
+            slow = self.client.get(TAG_URL, params)
+            with override_settings(FAST_LIST_SERIALIZATION=True):
+                fast = self.client.get(TAG_URL, params)
+
+            self.assertEqual(fast.status_code, status.HTTP_200_OK)
+            self.assertEqual(fast.content, slow.content, params)
+
+    def test_invalid_usage_params(self):
+        """Test unknown assigned_only and order values are rejected"""
+        for params in ({"assigned_only": "yes"}, {"order": "name"}):
+            res = self.client.get(TAG_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def autocomplete(self, prefix, **params):
+        res = self.client.get(AUTOCOMPLETE_URL, {"prefix": prefix, **params})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [item["name"] for item in res.data]
+
+    def test_autocomplete_prefix(self):
+        """Test autocomplete returns the user's names starting with the prefix"""
+        for name in ("Vegan", "vegetarian", "Desert", "Very spicy"):
+            Tag.objects.create(user=self.user, name=name)
+        Tag.objects.create(user=create_user(), name="Vegetable")
+
+        self.assertEqual(self.autocomplete("veg"), ["Vegan", "vegetarian"])
+        self.assertEqual(self.autocomplete("ve", limit=2), ["Vegan", "vegetarian"])
+        self.assertEqual(self.autocomplete("x"), [])
+
+    def test_autocomplete_sees_new_and_renamed_tags(self):
+        """Test autocomplete reflects tags created and renamed after it was cached"""
+        tag = Tag.objects.create(user=self.user, name="Lunch")
+        self.assertEqual(self.autocomplete("l"), ["Lunch"])
+
+        Tag.objects.create(user=self.user, name="Late night")
+        tag.name = "Brunch"
+        tag.save()
+
+        self.assertEqual(self.autocomplete("l"), ["Late night"])
+
+    def test_autocomplete_cache_headers(self):
+        """Test autocomplete responses are privately cacheable"""
+        res = self.client.get(AUTOCOMPLETE_URL, {"prefix": "a"})
+
+        self.assertIn("private", res["Cache-Control"])
+        self.assertIn("max-age", res["Cache-Control"])
+
+    @override_settings(AUTOCOMPLETE_MAX_CACHED_NAMES=1)
+    def test_autocomplete_large_vocabulary_uses_database(self):
+        """Test users with too many names to cache are served from the database"""
+        for name in ("Vegan", "vegetarian", "Desert"):
+            Tag.objects.create(user=self.user, name=name)
+
+        self.assertEqual(self.autocomplete("VEG"), ["Vegan", "vegetarian"])
+
@@ -1,16 +1,68 @@
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Exists, F, OuterRef, Prefetch
+from django.utils.cache import patch_cache_control, patch_vary_headers
 from rest_framework import viewsets, mixins
-from rest_framework.authentication import TokenAuthentication
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
-from battery.models import Recipe, Tag, Ingredient
+from rest_framework.response import Response
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema, extend_schema_view
+from battery import autocomplete, pantry, search, sync
+from battery.fastpath import FastListMixin
+from battery.models import Recipe, Tag, Ingredient, Tombstone
+from user.authentication import API_AUTHENTICATION_CLASSES
 from recipe.serializers import (
+    CookableRecipeSerializer,
     RecipeSerializer,
     RecipeDetailSerializer,
     TagSerializer,
+    TagUsageSerializer,
     IngredientSerializer,
+    IngredientUsageSerializer,
 )
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+SPARSE_FIELDS_PARAMETERS = [
+    OpenApiParameter(
+        "fields",
+        OpenApiTypes.STR,
+        description="Comma separated fields to return. Nested tags and ingredients "
+        "are left out unless named here or in expand.",
+    ),
+    OpenApiParameter(
+        "expand",
+        OpenApiTypes.STR,
+        description="Comma separated nested relations to return with fields.",
+    ),
+]
+
+
+@extend_schema_view(
+    retrieve=extend_schema(parameters=SPARSE_FIELDS_PARAMETERS),
+    list=extend_schema(
+        parameters=SPARSE_FIELDS_PARAMETERS
+        + [
+            OpenApiParameter("q", OpenApiTypes.STR, description="Text to search for."),
+            OpenApiParameter(
+                "tags", OpenApiTypes.STR, description="Comma separated tag ids to filter by."
+            ),
+            OpenApiParameter(
+                "ingredients",
+                OpenApiTypes.STR,
+                description="Comma separated ingredient ids to filter by.",
+            ),
+            OpenApiParameter(
+                "match",
+                OpenApiTypes.STR,
+                enum=["any", "all"],
+                description="Whether recipes need any (default) or all of the ids.",
+            ),
+        ]
+    ),
+)
+class RecipeViewSet(FastListMixin, viewsets.ModelViewSet):
     """
     ViewSet for the Recipe model allowing full CRUD operations via the API.
 
@@ -31,28 +83,189 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
     queryset = Recipe.objects.all()
     serializer_class = RecipeDetailSerializer
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = API_AUTHENTICATION_CLASSES
     permission_classes = (IsAuthenticated,)
+    read_actions = ("list", "retrieve", "changes", "cookable")
 
     def get_queryset(self):
         """
         Retrieves the queryset of Recipe objects for the current user.
 
+        Explanation:
+        Read actions load only the columns of the fields being rendered and prefetch
+        only the requested nested relations, so a page of recipes costs a constant number
+        of queries and a request without relations never queries them. Write actions keep
+        every column loaded so saving does not skip deferred fields. A list request with
+        a q parameter is narrowed to matching recipes, most relevant first.
+
         Returns:
             QuerySet: The queryset of Recipe objects for the current user.
         """
-        return Recipe.objects.filter(user=self.request.user).order_by("-id")
+        queryset = Recipe.objects.filter(user=self.request.user).order_by("-id")
+        if self.action in self.read_actions:
+            columns = {field.name for field in Recipe._meta.concrete_fields}
+            fields = self.get_serializer_class().requested_fields(
+                self.request.query_params
+            )
+            queryset = queryset.only(
+                "id", *(field for field in fields if field in columns)
+            )
+            for name, model in (("tags", Tag), ("ingredients", Ingredient)):
+                if name in fields:
+                    related = model.objects.only("id", "name").order_by("id")
+                    queryset = queryset.prefetch_related(Prefetch(name, queryset=related))
 
-    def get_serializer_class(self):
         if self.action == "list":
+            queryset = self._filter_by_attrs(queryset)
+            text = self.request.query_params.get("q", "").strip()
+            if text:
+                queryset = search.search_recipes(queryset, text)
+        return queryset
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "pantry",
+                OpenApiTypes.STR,
+                description="Comma separated ids of the ingredients at hand.",
+            ),
+            OpenApiParameter(
+                "limit", OpenApiTypes.INT, description="Maximum number of recipes."
+            ),
+        ]
+    )
+    @action(detail=False)
+    def cookable(self, request):
+        """
+        Ranks the user's recipes by how much of each the given pantry covers.
+
+        Explanation:
+        Matching runs as set operations on the user's cached recipe to ingredient index,
+        then only the ranked page of recipes is loaded from the database.
+
+        Args:
+            request: The incoming request with the pantry ingredient ids.
+
+        Returns:
+            Response: Recipes sharing an ingredient with the pantry, fully cookable ones
+            first, then by fewest missing ingredients.
+        """
+        try:
+            limit = int(request.query_params.get("limit", 50))
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            raise ValidationError({"limit": ["Expected a positive number."]})
+        limit = min(limit, 200)
+
+        ranked = pantry.rank(request.user.id, self._params_to_ints("pantry"))[:limit]
+        recipes = self.get_queryset().in_bulk([recipe_id for recipe_id, _ in ranked])
+        results = []
+        for recipe_id, missing in ranked:
+            recipe = recipes.get(recipe_id)
+            if recipe is not None:
+                recipe.missing_ingredients = sorted(missing)
+                results.append(recipe)
+
+        serializer = self.get_serializer(results, many=True)
+        return Response(serializer.data)
+
+    def _params_to_ints(self, name):
+        """Convert a comma separated query parameter to a list of integers."""
+        value = self.request.query_params.get(name, "")
+        try:
+            return [int(str_id) for str_id in value.split(",") if str_id.strip()]
+        except ValueError:
+            raise ValidationError({name: ["Expected comma separated ids."]})
+
+    def _filter_by_attrs(self, queryset):
+        """
+        Narrows recipes to those linked to the requested tags and ingredients.
+
+        Explanation:
+        Each filter is a semijoin against the link table, so recipes are never
+        duplicated and the whole list is still fetched in one query. With match=all a
+        recipe must be linked to every requested id, which the semijoin checks by
+        counting its matching links.
+
+        Args:
+            queryset: The Recipe queryset to filter.
+
+        Returns:
+            QuerySet: The filtered queryset.
+        """
+        match = self.request.query_params.get("match", "any")
+        if match not in ("any", "all"):
+            raise ValidationError({"match": ['Expected "any" or "all".']})
+
+        for name, column in (("tags", "tag_id"), ("ingredients", "ingredient_id")):
+            ids = set(self._params_to_ints(name))
+            if not ids:
+                continue
+            links = getattr(Recipe, name).through.objects.filter(
+                recipe_id=OuterRef("pk"), **{f"{column}__in": ids}
+            )
+            if match == "all":
+                links = (
+                    links.values("recipe_id")
+                    .annotate(matched=Count(column))
+                    .filter(matched=len(ids))
+                )
+            queryset = queryset.filter(Exists(links))
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action in ("list", "changes"):
             return RecipeSerializer
+        if self.action == "cookable":
+            return CookableRecipeSerializer
         return super().get_serializer_class()
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    @action(detail=False)
+    def changes(self, request):
+        """
+        Lists the recipes created, updated or deleted since the client's last sync.
 
+        Args:
+            request: The incoming request, with an optional since cursor from a previous sync.
+
+        Returns:
+            Response: The next cursor, the changed recipes, the ids of deleted recipes and
+            whether the client must replace its copy.
+        """
+        cursor, recipes, deleted, reset = sync.changes_since(
+            request, self.get_queryset(), Tombstone.RECIPE
+        )
+        serializer = self.get_serializer(recipes, many=True)
+        return Response(
+            {"cursor": cursor, "changed": serializer.data, "deleted": deleted, "reset": reset}
+        )
+
+
+@extend_schema_view(
+    list=extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "assigned_only",
+                OpenApiTypes.INT,
+                enum=[0, 1],
+                description="Only list items assigned to at least one recipe.",
+            ),
+            OpenApiParameter(
+                "order",
+                OpenApiTypes.STR,
+                enum=["usage"],
+                description="Order by the number of recipes using each item, "
+                "adding that number as usage.",
+            ),
+        ]
+    )
+)
 class BaseRecipeAttrViewSet(
+    FastListMixin,
     mixins.UpdateModelMixin,
     mixins.DestroyModelMixin,
     mixins.ListModelMixin,
@@ -63,23 +276,110 @@ class BaseRecipeAttrViewSet(
 
     Attributes:
         queryset (QuerySet): The queryset of recipe attributes to be used by the ViewSet.
+        usage_serializer_class (Serializer): The serializer used when ordering by usage.
 
     Methods:
         list: Retrieves a list of recipe attributes.
     """
 
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = API_AUTHENTICATION_CLASSES
     permission_classes = (IsAuthenticated,)
 
     def get_queryset(self):
-        return self.queryset.filter(user=self.request.user)
+        """
+        Retrieves the recipe attributes of the current user.
+
+        Explanation:
+        For a list request, assigned_only and order=usage are answered by one grouped
+        query that counts each item's links to recipes. The link table is unique per
+        (recipe, item), so the count needs no DISTINCT.
+
+        Returns:
+            QuerySet: The recipe attributes of the current user.
+        """
+        queryset = self.queryset.filter(user=self.request.user)
+        if self.action != "list":
+            return queryset
+
+        params = self.request.query_params
+        if params.get("assigned_only", "0") not in ("0", "1"):
+            raise ValidationError({"assigned_only": ['Expected "0" or "1".']})
+        if params.get("order", "usage") != "usage":
+            raise ValidationError({"order": ['Expected "usage".']})
+        assigned_only = params.get("assigned_only") == "1"
+        by_usage = params.get("order") == "usage"
+        if assigned_only or by_usage:
+            queryset = queryset.annotate(usage=Count("recipe"))
+        if assigned_only:
+            queryset = queryset.filter(usage__gt=0)
+        if by_usage:
+            queryset = queryset.order_by("-usage", "name")
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action == "list" and self.request.query_params.get("order") == "usage":
+            return self.usage_serializer_class
+        return super().get_serializer_class()
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("prefix", OpenApiTypes.STR, description="Text typed so far."),
+            OpenApiParameter(
+                "limit", OpenApiTypes.INT, description="Maximum number of names."
+            ),
+        ]
+    )
+    @action(detail=False)
+    def autocomplete(self, request):
+        """
+        Suggests the user's names starting with the given prefix, ignoring case.
+
+        Args:
+            request: The incoming request with the prefix typed so far.
+
+        Returns:
+            Response: Up to limit matches, marked privately cacheable by the client.
+        """
+        prefix = request.query_params.get("prefix", "")
+        try:
+            limit = min(max(int(request.query_params.get("limit", 10)), 1), 50)
+        except ValueError:
+            raise ValidationError({"limit": ["Expected a number."]})
+
+        matches = autocomplete.complete(self.queryset.model, request.user.id, prefix, limit)
+        response = Response([{"id": pk, "name": name} for pk, name in matches])
+        patch_cache_control(
+            response, private=True, max_age=settings.AUTOCOMPLETE_CACHE_TIMEOUT
+        )
+        patch_vary_headers(response, ["Authorization"])
+        return response
+
+    def perform_update(self, serializer):
+        try:
+            with transaction.atomic():
+                instance = serializer.save()
+        except IntegrityError:
+            raise ValidationError({"name": ["You already have one with this name."]})
+        self.touch_recipes(instance)
+
+    def perform_destroy(self, instance):
+        self.touch_recipes(instance)
+        instance.delete()
+
+    def touch_recipes(self, instance):
+        # Renaming or deleting an attribute changes how its recipes serialize without
+        # writing their rows. The sync feed finds changed recipes by the change_xid a
+        # trigger stamps on every row write, so a no-op update brings them into it.
+        instance.recipe_set.update(change_xid=F("change_xid"))
 
 
 class IngredientViewSet(BaseRecipeAttrViewSet):
     serializer_class = IngredientSerializer
+    usage_serializer_class = IngredientUsageSerializer
     queryset = Ingredient.objects.all()
 
 
 class TagViewSet(BaseRecipeAttrViewSet):
     serializer_class = TagSerializer
+    usage_serializer_class = TagUsageSerializer
     queryset = Tag.objects.all()
@@ -8,8 +8,10 @@ echo "Running production setup script..."
 apt-get update && \
 apt-get install -y libpq-dev python3-dev build-essential && \
 
-# Add psycopg2 to requirements.txt
+# Add psycopg2, the gunicorn application server and the redis cache client to requirements.txt
 echo "psycopg2" >> requirements.txt && \
+echo "gunicorn" >> requirements.txt && \
+echo "redis" >> requirements.txt && \
 
 # Clean up
 apt-get autoremove && apt-get -y purge libpq-dev python3-dev build-essential 
@@ -0,0 +1,103 @@
+from hashlib import sha256
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+from user import tokens
+
+
+def _cache_key(key):
+    # Hash the token so raw credentials never end up in cache keys.
+    return f"auth-token:{sha256(key.encode()).hexdigest()}"
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication that keeps the token and its user in the cache.
+
+    Explanation:
+    A verified token is cached with its user for TOKEN_CACHE_TIMEOUT seconds, so
+    repeated requests with the same token skip the token and user query. The entry is
+    dropped when the token is deleted or rotated and whenever its user is saved, which
+    covers password and is_active changes, so a revoked token stops working on the
+    next request. That holds across workers only because they share the cache set by
+    CACHE_URL, which gunicorn requires before running more than one. The cached user
+    is only read from; ManageUserView saves changes to a fresh copy.
+    """
+
+    def authenticate_credentials(self, key):
+        """
+        Returns the user and token for a token key, reading the cache first.
+
+        Args:
+            key (str): The token key sent by the client.
+
+        Returns:
+            tuple: The token's user and the token.
+
+        Raises:
+            AuthenticationFailed: If the token is unknown or its user is inactive.
+        """
+
+        token = cache.get(_cache_key(key))
+        if token is not None:
+            return (token.user, token)
+
+        user, token = super().authenticate_credentials(key)
+        cache.set(_cache_key(key), token, settings.TOKEN_CACHE_TIMEOUT)
+        return (user, token)
+
+
+class SignedTokenAuthentication(TokenAuthentication):
+    """
+    Authentication with signed, expiring access tokens sent as "Bearer <token>".
+
+    Explanation:
+    The token's signature, age, revocation and version are checked without the
+    database, and its user is read from the cache, so a request with a valid token
+    normally costs no query. The cached user is dropped whenever the user is saved, so
+    a deactivated user, or one whose password changed, is rejected on their next request.
+    """
+
+    keyword = "Bearer"
+
+    def authenticate_credentials(self, key):
+        """
+        Returns the user and payload of a signed access token.
+
+        Args:
+            key (str): The signed token sent by the client.
+
+        Returns:
+            tuple: The token's user and the token payload.
+
+        Raises:
+            AuthenticationFailed: If the token is invalid, expired or revoked, or its
+            user is missing or inactive.
+        """
+
+        try:
+            user, payload = tokens.verify_access_token(key)
+        except signing.BadSignature:
+            raise AuthenticationFailed(_("Invalid or expired token."))
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User inactive or deleted."))
+        return (user, payload)
+
+
+API_AUTHENTICATION_CLASSES = (CachedTokenAuthentication, SignedTokenAuthentication)
+
+
+def invalidate(key):
+    """Drops the cached user of a token key."""
+    cache.delete(_cache_key(key))
+
+
+def invalidate_user(user_id):
+    """Drops the cached user of signed access tokens."""
+    tokens.forget_user(user_id)
@@ -0,0 +1,47 @@
+import time
+
+from django.contrib.auth.hashers import get_hashers
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Times password verification, the CPU cost of a login, for each hasher."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        """
+        A management command timing each configured password hasher.
+
+        Args:
+            self: The command instance.
+
+        Returns:
+            None
+
+        Examples:
+            Run with the PASSWORD_* cost settings of an environment to choose a cost
+            that keeps a login within budget on its hardware. Hashers whose library is
+            not installed are reported and skipped.
+        """
+        for hasher in get_hashers():
+            try:
+                encoded = hasher.encode("correct horse battery staple", hasher.salt())
+            except ValueError as exc:
+                self.stdout.write(f"{hasher.algorithm}: skipped ({exc})")
+                continue
+
+            timings = []
+            for _ in range(options["repeat"]):
+                start = time.perf_counter()
+                hasher.verify("correct horse battery staple", encoded)
+                timings.append(time.perf_counter() - start)
+            cost = ", ".join(
+                f"{name} {value}"
+                for name, value in hasher.safe_summary(encoded).items()
+                if name not in ("algorithm", "salt", "hash")
+            )
+            self.stdout.write(
+                f"{hasher.algorithm}: {min(timings) * 1000:.1f}ms per login ({cost})"
+            )
@@ -3,6 +3,8 @@ from django.utils.translation import gettext_lazy as _
 
 from rest_framework import serializers
 
+from user import tokens
+
 
 class UserSerializer(serializers.ModelSerializer):
     """Serializers for user model."""
@@ -42,6 +44,8 @@ class UserSerializer(serializers.ModelSerializer):
 
         if password:
             user.set_password(password)
+            # Sessions elsewhere must not outlive the old password.
+            tokens.invalidate_user_tokens(user)
             user.save()
 
         return user
@@ -76,3 +80,15 @@ class AuthTokenSerializer(serializers.Serializer):
 
         attrs["user"] = user
         return attrs
+
+
+class RefreshTokenSerializer(serializers.Serializer):
+    """Serializer for a refresh token."""
+
+    refresh = serializers.CharField(trim_whitespace=False)
+
+
+class RevokeTokenSerializer(RefreshTokenSerializer):
+    """Serializer for the tokens revoked on logout."""
+
+    access = serializers.CharField(required=False, trim_whitespace=False)
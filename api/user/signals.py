@@ -0,0 +1,27 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from . import authentication
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def invalidate_cached_token(sender, instance, **kwargs):
+    authentication.invalidate(instance.key)
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_cached_tokens_of_user(sender, instance, created, raw=False, **kwargs):
+    # Password, is_active and profile changes must not be served from a stale entry.
+    if created or raw:
+        return
+    authentication.invalidate_user(instance.pk)
+    for key in Token.objects.filter(user=instance).values_list("key", flat=True):
+        authentication.invalidate(key)
+
+
+@receiver(post_delete, sender=get_user_model())
+def invalidate_cached_user(sender, instance, **kwargs):
+    authentication.invalidate_user(instance.pk)
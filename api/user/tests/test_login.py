@@ -0,0 +1,136 @@
+"""Tests for login throttling and password hash upgrades."""
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from battery.tests.test_database import load_setting
+
+CREATE_USER_URL = reverse("user:create")
+TOKEN_URL = reverse("user:token")
+ACCESS_URL = reverse("user:token-access")
+
+
+def throttle_rates(**rates):
+    """Return REST_FRAMEWORK settings with the given throttle rates."""
+    from django.conf import settings
+
+    defaults = settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"]
+    return {
+        **settings.REST_FRAMEWORK,
+        "DEFAULT_THROTTLE_RATES": {**defaults, **rates},
+    }
+
+
+class LoginThrottleTests(TestCase):
+    """Test login and signup attempts are throttled."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        get_user_model().objects.create_user(
+            email="test@example.com", password="testpass123"
+        )
+
+    def test_login_throttled_per_email(self):
+        """Test repeated bad logins for one email are throttled across endpoints."""
+        payload = {"email": "test@example.com", "password": "wrong"}
+        with self.settings(REST_FRAMEWORK=throttle_rates(login_email="2/min")):
+            for url in (TOKEN_URL, ACCESS_URL):
+                res = self.client.post(url, payload)
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+            res = self.client.post(TOKEN_URL, {**payload, "email": "TEST@example.com"})
+            self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+            self.assertIn("Retry-After", res)
+
+            res = self.client.post(TOKEN_URL, {**payload, "email": "other@example.com"})
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_login_throttled_per_ip(self):
+        """Test attempts from one address are throttled whatever the email."""
+        with self.settings(REST_FRAMEWORK=throttle_rates(login_ip="2/min")):
+            for i in range(2):
+                self.client.post(TOKEN_URL, {"email": f"{i}@example.com", "password": "x"})
+
+            res = self.client.post(TOKEN_URL, {"email": "3@example.com", "password": "x"})
+            self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+            res = self.client.post(
+                TOKEN_URL,
+                {"email": "3@example.com", "password": "x"},
+                REMOTE_ADDR="10.0.0.2",
+            )
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_signup_throttled_per_ip(self):
+        """Test account creation from one address is throttled."""
+        with self.settings(REST_FRAMEWORK=throttle_rates(signup_ip="1/hour")):
+            payload = {"email": "new@example.com", "password": "testpass123", "name": "N"}
+            res = self.client.post(CREATE_USER_URL, payload)
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+            res = self.client.post(CREATE_USER_URL, {**payload, "email": "new2@example.com"})
+            self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+
+class PasswordHashUpgradeTests(TestCase):
+    """Test stored hashes follow the configured hasher cost."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def login(self):
+        return self.client.post(
+            TOKEN_URL, {"email": "test@example.com", "password": "testpass123"}
+        )
+
+    def test_hash_upgraded_on_login(self):
+        """Test a hash with an outdated cost is rehashed on successful login."""
+        with self.settings(PASSWORD_PBKDF2_ITERATIONS=1000):
+            user = get_user_model().objects.create_user(
+                email="test@example.com", password="testpass123"
+            )
+        self.assertIn("$1000$", user.password)
+
+        with self.settings(PASSWORD_PBKDF2_ITERATIONS=2000):
+            res = self.login()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith("pbkdf2_sha256$2000$"))
+
+    @override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+    def test_failed_login_keeps_hash(self):
+        """Test a wrong password never rewrites the stored hash."""
+        user = get_user_model().objects.create_user(
+            email="test@example.com", password="testpass123"
+        )
+
+        with self.settings(PASSWORD_PBKDF2_ITERATIONS=2000):
+            self.client.post(TOKEN_URL, {"email": "test@example.com", "password": "x"})
+
+        password = user.password
+        user.refresh_from_db()
+        self.assertEqual(user.password, password)
+
+
+class PasswordHasherSettingTests(SimpleTestCase):
+    """Test the PASSWORD_HASHER setting."""
+
+    def test_preferred_hasher_first(self):
+        """Test the chosen hasher is used for new hashes, whatever its case."""
+        hashers = load_setting("PASSWORD_HASHERS", PASSWORD_HASHER="PBKDF2")
+
+        self.assertEqual(hashers[0], "user.hashers.TunablePBKDF2PasswordHasher")
+
+    def test_unknown_hasher_refused(self):
+        """Test a misspelt hasher is refused at startup."""
+        with self.assertRaises(ImproperlyConfigured):
+            load_setting("PASSWORD_HASHERS", PASSWORD_HASHER="argon")
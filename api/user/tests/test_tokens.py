@@ -0,0 +1,145 @@
+"""Tests for signed access tokens and refresh tokens."""
+
+import time
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from battery.models import RefreshToken
+
+ACCESS_URL = reverse("user:token-access")
+REFRESH_URL = reverse("user:token-refresh")
+REVOKE_URL = reverse("user:token-revoke")
+ME_URL = reverse("user:me")
+
+
+class SignedTokenTests(TestCase):
+    """Test issuing, using, refreshing and revoking signed tokens."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="test@example.com", password="testpass123", name="Test"
+        )
+        self.client = APIClient()
+
+    def login(self):
+        res = self.client.post(
+            ACCESS_URL, {"email": "test@example.com", "password": "testpass123"}
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def get_me(self, access):
+        return self.client.get(ME_URL, HTTP_AUTHORIZATION=f"Bearer {access}")
+
+    def test_access_token_authenticates_without_queries(self):
+        """Test a signed token is verified without touching the database once warm."""
+        pair = self.login()
+
+        self.assertEqual(self.get_me(pair["access"]).status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(0):
+            res = self.get_me(pair["access"])
+        self.assertEqual(res.data["email"], self.user.email)
+
+    def test_bad_credentials_issue_no_tokens(self):
+        """Test a wrong password is rejected."""
+        res = self.client.post(
+            ACCESS_URL, {"email": "test@example.com", "password": "wrong"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(RefreshToken.objects.exists())
+
+    def test_tampered_token_rejected(self):
+        """Test a token with a modified payload is rejected."""
+        access = self.login()["access"]
+
+        res = self.get_me(access[:-1] + ("A" if access[-1] != "A" else "B"))
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(ACCESS_TOKEN_LIFETIME=60)
+    def test_expired_token_rejected(self):
+        """Test an access token stops working once its lifetime has passed."""
+        access = self.login()["access"]
+
+        with patch("django.core.signing.time.time", return_value=time.time() + 61):
+            res = self.get_me(access)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_rotates_tokens(self):
+        """Test a refresh token is exchanged once for a new working pair."""
+        pair = self.login()
+
+        res = self.client.post(REFRESH_URL, {"refresh": pair["refresh"]})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.get_me(res.data["access"]).status_code, status.HTTP_200_OK)
+
+        res = self.client.post(REFRESH_URL, {"refresh": pair["refresh"]})
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_expired_refresh_token_rejected(self):
+        """Test an expired refresh token cannot be exchanged."""
+        pair = self.login()
+        RefreshToken.objects.update(expires_at="2000-01-01T00:00:00Z")
+
+        res = self.client.post(REFRESH_URL, {"refresh": pair["refresh"]})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertFalse(RefreshToken.objects.exists())
+
+    def test_revoke_logs_out(self):
+        """Test revoking stops both the access and the refresh token at once."""
+        pair = self.login()
+        self.get_me(pair["access"])
+
+        res = self.client.post(REVOKE_URL, pair)
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(
+            self.get_me(pair["access"]).status_code, status.HTTP_401_UNAUTHORIZED
+        )
+        res = self.client.post(REFRESH_URL, {"refresh": pair["refresh"]})
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        """Test a deactivated user's access token stops working at once."""
+        access = self.login()["access"]
+        self.get_me(access)
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.get_me(access).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_invalidates_tokens(self):
+        """Test changing the password ends every existing session of the user."""
+        pair = self.login()
+        other = self.login()
+        self.get_me(pair["access"])
+
+        res = self.client.patch(
+            ME_URL,
+            {"password": "newpassword123"},
+            HTTP_AUTHORIZATION=f"Bearer {pair['access']}",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(RefreshToken.objects.filter(user=self.user).exists())
+        for access in (pair["access"], other["access"]):
+            self.assertEqual(self.get_me(access).status_code, status.HTTP_401_UNAUTHORIZED)
+        res = self.client.post(REFRESH_URL, {"refresh": other["refresh"]})
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        res = self.client.post(
+            ACCESS_URL, {"email": "test@example.com", "password": "newpassword123"}
+        )
+        self.assertEqual(self.get_me(res.data["access"]).status_code, status.HTTP_200_OK)
@@ -2,11 +2,14 @@
 
 from django.test import TestCase
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.urls import reverse
 
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from battery.testing import QueryBudgetMixin
+
 CREATE_USER_URL = reverse("user:create")
 TOKEN_URL = reverse("user:token")
 ME_URL = reverse("user:me")
@@ -21,6 +24,7 @@ class publicUserApiTests(TestCase):
     """Test the publicly available user API"""
 
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
 
     def test_create_valid_user_success(self):
@@ -129,7 +133,7 @@ class publicUserApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
-class PrivateUserApiTests(TestCase):
+class PrivateUserApiTests(QueryBudgetMixin, TestCase):
     """Test API requests that require authentication."""
 
     def setUp(self):
@@ -149,6 +153,11 @@ class PrivateUserApiTests(TestCase):
         self.assertEqual(res.data, {"name": self.user.name, "email": self.user.email})
         self.assertTrue(self.user.check_password("XXXXXXXX"))
     
+    def test_retrieve_profile_query_budget(self):
+        """Test the profile is served from the authenticated user without queries."""
+        with self.assertMaxQueries(0):
+            self.client.get(ME_URL)
+
     def test_post_me_not_allowed(self):
         """Test that POST is not allowed on the me url."""
         res = self.client.post(ME_URL, {})
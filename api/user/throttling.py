@@ -0,0 +1,60 @@
+from hashlib import sha256
+
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class SettingsRateThrottle(SimpleRateThrottle):
+    """
+    Rate throttle that reads its rate from the settings on every request.
+
+    Explanation:
+    Request histories are kept in the default cache. Gunicorn only runs several
+    workers when CACHE_URL configures a shared cache, so each limit applies across
+    all workers and survives worker recycling.
+    """
+
+    def get_rate(self):
+        # SimpleRateThrottle copies the rates at import, hiding later settings changes.
+        return api_settings.DEFAULT_THROTTLE_RATES[self.scope]
+
+
+class IPRateThrottle(SettingsRateThrottle):
+    """Limits requests to a view by client IP address, whether authenticated or not."""
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {"scope": self.scope, "ident": self.get_ident(request)}
+
+
+class EmailRateThrottle(SettingsRateThrottle):
+    """
+    Limits requests to a view by the email address in the request body.
+
+    Explanation:
+    Spreading attempts at one account across many addresses still hits this limit. The
+    email is hashed so addresses never end up in cache keys. Requests without an email
+    are left to the IP throttle.
+    """
+
+    def get_cache_key(self, request, view):
+        email = request.data.get("email") if hasattr(request.data, "get") else None
+        if not isinstance(email, str) or not email.strip():
+            return None
+        ident = sha256(email.strip().lower().encode()).hexdigest()
+        return self.cache_format % {"scope": self.scope, "ident": ident}
+
+
+class LoginIPThrottle(IPRateThrottle):
+    scope = "login_ip"
+
+
+class LoginEmailThrottle(EmailRateThrottle):
+    scope = "login_email"
+
+
+class SignupIPThrottle(IPRateThrottle):
+    scope = "signup_ip"
+
+
+class SignupEmailThrottle(EmailRateThrottle):
+    scope = "signup_email"
@@ -0,0 +1,174 @@
+import secrets
+from datetime import timedelta
+from hashlib import sha256
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from battery.models import RefreshToken
+
+ACCESS_TOKEN_SALT = "user.tokens.access"
+
+
+def _revoked_key(jti):
+    return f"revoked-access-token:{jti}"
+
+
+def _user_key(user_id):
+    return f"auth-user:{user_id}"
+
+
+def _hash(key):
+    return sha256(key.encode()).hexdigest()
+
+
+def get_user(user_id):
+    """
+    Returns a user, keeping it in the cache for TOKEN_CACHE_TIMEOUT seconds.
+
+    Args:
+        user_id (int): The id of the user.
+
+    Returns:
+        User: The user, or None if it does not exist.
+    """
+
+    user = cache.get(_user_key(user_id))
+    if user is None:
+        user = get_user_model().objects.filter(pk=user_id).first()
+        if user is not None:
+            cache.set(_user_key(user_id), user, settings.TOKEN_CACHE_TIMEOUT)
+    return user
+
+
+def forget_user(user_id):
+    """Drops a user from the cache, so the next request reads it again."""
+    cache.delete(_user_key(user_id))
+
+
+def issue_access_token(user):
+    """
+    Signs a short-lived access token for a user.
+
+    Args:
+        user: The user the token authenticates.
+
+    Returns:
+        str: The signed token, carrying the user id, the user's token version and a
+        unique token id.
+    """
+
+    payload = {"uid": user.pk, "ver": user.token_version, "jti": secrets.token_urlsafe(12)}
+    return signing.dumps(payload, salt=ACCESS_TOKEN_SALT)
+
+
+def verify_access_token(token):
+    """
+    Checks the signature, age, revocation and version of an access token.
+
+    Explanation:
+    Revocations and users are read from the cache, which CACHE_URL shares between
+    workers, so a valid token normally costs no query.
+
+    Args:
+        token (str): The signed token sent by the client.
+
+    Returns:
+        tuple: The token's user and the token payload.
+
+    Raises:
+        BadSignature: If the token was tampered with, has expired or was revoked, its
+        user no longer exists, or the user's tokens were invalidated since it was issued.
+    """
+
+    payload = signing.loads(
+        token, salt=ACCESS_TOKEN_SALT, max_age=settings.ACCESS_TOKEN_LIFETIME
+    )
+    if cache.get(_revoked_key(payload["jti"])):
+        raise signing.BadSignature("Token has been revoked.")
+    user = get_user(payload["uid"])
+    if user is None or payload.get("ver", 0) != user.token_version:
+        raise signing.BadSignature("Token has been invalidated.")
+    return (user, payload)
+
+
+def revoke_access_token(payload):
+    """Adds an access token to the shared revocation list until it would have expired."""
+    cache.set(_revoked_key(payload["jti"]), True, settings.ACCESS_TOKEN_LIFETIME)
+
+
+def issue_token_pair(user):
+    """
+    Issues a signed access token and a database-backed refresh token.
+
+    Args:
+        user: The user the tokens authenticate.
+
+    Returns:
+        dict: The access token, the refresh token and the access token lifetime.
+    """
+
+    refresh = secrets.token_urlsafe(32)
+    RefreshToken.objects.create(
+        user=user,
+        key_hash=_hash(refresh),
+        expires_at=timezone.now() + timedelta(seconds=settings.REFRESH_TOKEN_LIFETIME),
+    )
+    return {
+        "access": issue_access_token(user),
+        "refresh": refresh,
+        "expires_in": settings.ACCESS_TOKEN_LIFETIME,
+    }
+
+
+def rotate_refresh_token(refresh):
+    """
+    Exchanges a refresh token for a new token pair, consuming it.
+
+    Args:
+        refresh (str): The refresh token sent by the client.
+
+    Returns:
+        dict: A new token pair, or None if the refresh token is unknown, expired,
+        already used or belongs to an inactive user.
+    """
+
+    with transaction.atomic():
+        token = (
+            RefreshToken.objects.select_for_update()
+            .select_related("user")
+            .filter(key_hash=_hash(refresh))
+            .first()
+        )
+        if token is None:
+            return None
+        token.delete()
+        if token.expires_at <= timezone.now() or not token.user.is_active:
+            return None
+        return issue_token_pair(token.user)
+
+
+def revoke_refresh_token(refresh):
+    """Deletes a refresh token so it can no longer be exchanged."""
+    RefreshToken.objects.filter(key_hash=_hash(refresh)).delete()
+
+
+def invalidate_user_tokens(user):
+    """
+    Invalidates every access and refresh token of a user, e.g. after a password change.
+
+    Explanation:
+    Refresh tokens are deleted, and the user's token version is bumped so that access
+    tokens signed with the previous version are refused. The caller saves the user,
+    which also drops it from the cache.
+
+    Args:
+        user: The user whose tokens are invalidated.
+    """
+
+    user.token_version += 1
+    RefreshToken.objects.filter(user=user).delete()
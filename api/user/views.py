@@ -1,7 +1,23 @@
-from user.serializers import UserSerializer, AuthTokenSerializer
-from rest_framework import generics, authentication, permissions
+from django.contrib.auth import get_user_model
+from django.core import signing
+from user.serializers import (
+    UserSerializer,
+    AuthTokenSerializer,
+    RefreshTokenSerializer,
+    RevokeTokenSerializer,
+)
+from rest_framework import generics, permissions, status
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
+from user import tokens
+from user.authentication import API_AUTHENTICATION_CLASSES
+from user.throttling import (
+    LoginEmailThrottle,
+    LoginIPThrottle,
+    SignupEmailThrottle,
+    SignupIPThrottle,
+)
 
 
 class CreateUserView(generics.CreateAPIView):
@@ -13,6 +29,7 @@ class CreateUserView(generics.CreateAPIView):
     """
 
     serializer_class = UserSerializer
+    throttle_classes = [SignupIPThrottle, SignupEmailThrottle]
 
 
 class CreateTokenView(ObtainAuthToken):
@@ -25,6 +42,109 @@ class CreateTokenView(ObtainAuthToken):
 
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    throttle_classes = [LoginIPThrottle, LoginEmailThrottle]
+
+
+class CreateAccessTokenView(generics.GenericAPIView):
+    """
+    View for exchanging credentials for a signed access token and a refresh token.
+
+    Returns:
+        None
+    """
+
+    serializer_class = AuthTokenSerializer
+    authentication_classes = []
+    throttle_classes = [LoginIPThrottle, LoginEmailThrottle]
+
+    def post(self, request):
+        """
+        Issues a token pair for valid credentials.
+
+        Args:
+            request: The incoming request with an email and password.
+
+        Returns:
+            Response: The access token, refresh token and access token lifetime.
+        """
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(tokens.issue_token_pair(serializer.validated_data["user"]))
+
+
+class RefreshAccessTokenView(generics.GenericAPIView):
+    """
+    View for exchanging a refresh token for a new token pair.
+
+    Returns:
+        None
+    """
+
+    serializer_class = RefreshTokenSerializer
+    authentication_classes = []
+
+    def post(self, request):
+        """
+        Rotates a refresh token, issuing a new access and refresh token.
+
+        Args:
+            request: The incoming request with a refresh token.
+
+        Returns:
+            Response: The new token pair, or a 401 if the refresh token is invalid,
+            expired or already used.
+        """
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        pair = tokens.rotate_refresh_token(serializer.validated_data["refresh"])
+        if pair is None:
+            return Response(
+                {"detail": "Invalid or expired refresh token."},
+                status=status.HTTP_401_UNAUTHORIZED,
+            )
+        return Response(pair)
+
+
+class RevokeTokenView(generics.GenericAPIView):
+    """
+    View for logging out by revoking a refresh token and, optionally, an access token.
+
+    Returns:
+        None
+    """
+
+    serializer_class = RevokeTokenSerializer
+    authentication_classes = []
+
+    def post(self, request):
+        """
+        Revokes the given refresh token and access token.
+
+        Explanation:
+        An access token that is already invalid or expired is ignored, so a client can
+        always log out.
+
+        Args:
+            request: The incoming request with a refresh token and an optional access token.
+
+        Returns:
+            Response: An empty response.
+        """
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        tokens.revoke_refresh_token(serializer.validated_data["refresh"])
+        access = serializer.validated_data.get("access")
+        if access:
+            try:
+                _, payload = tokens.verify_access_token(access)
+                tokens.revoke_access_token(payload)
+            except signing.BadSignature:
+                pass
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
     """
@@ -35,15 +155,22 @@ class ManageUserView(generics.RetrieveUpdateAPIView):
     """
 
     serializer_class = UserSerializer
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = API_AUTHENTICATION_CLASSES
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
         """
         Retrieves the authenticated user object.
 
+        Explanation:
+        The authenticated user may come from the token cache, so updates are applied to
+        a fresh copy read from the database rather than saving every field of a copy
+        that can be out of date.
+
         Returns:
             User: The authenticated user object.
         """
 
-        return self.request.user
\ No newline at end of file
+        if self.request.method in permissions.SAFE_METHODS:
+            return self.request.user
+        return get_user_model().objects.get(pk=self.request.user.pk)
\ No newline at end of file
@@ -1,15 +1,35 @@
 import React, { Component, Fragment } from "react";
 import Header from "./components/Header";
 import Battery from "./components/Battery";
+import LoginForm from "./components/LoginForm";
+import { getToken, onUnauthorized } from "./auth";
 import './App.css';
 
 class App extends Component {
+  state = {
+    loggedIn: Boolean(getToken())
+  };
+
+  componentDidMount() {
+    this.stopListening = onUnauthorized(() =>
+      this.setState({ loggedIn: false })
+    );
+  }
+
+  componentWillUnmount() {
+    this.stopListening();
+  }
+
   render() {
     return (
       <div className="bg-dark text-light">
       <Fragment>
         <Header />
-        <Battery />
+        {this.state.loggedIn ? (
+          <Battery />
+        ) : (
+          <LoginForm onLogin={() => this.setState({ loggedIn: true })} />
+        )}
       </Fragment>
       </div>
     );
@@ -0,0 +1,38 @@
+import axios from "axios";
+
+const TOKEN_KEY = "token";
+
+// Sends the stored API token with every request, as the journal requires a user.
+const applyToken = token => {
+  if (token) {
+    axios.defaults.headers.common["Authorization"] = "Token " + token;
+  } else {
+    delete axios.defaults.headers.common["Authorization"];
+  }
+};
+
+export const getToken = () => localStorage.getItem(TOKEN_KEY);
+
+export const setToken = token => {
+  if (token) {
+    localStorage.setItem(TOKEN_KEY, token);
+  } else {
+    localStorage.removeItem(TOKEN_KEY);
+  }
+  applyToken(token);
+};
+
+// Forgets a token the API no longer accepts and lets the app ask for a new one.
+// Returns a function that stops listening.
+export const onUnauthorized = callback => {
+  const interceptor = axios.interceptors.response.use(undefined, error => {
+    if (error.response && error.response.status === 401) {
+      setToken(null);
+      callback();
+    }
+    return Promise.reject(error);
+  });
+  return () => axios.interceptors.response.eject(interceptor);
+};
+
+applyToken(getToken());
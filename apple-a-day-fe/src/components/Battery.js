@@ -9,7 +9,8 @@ import { API_URL } from "../constants";
 
 class Battery extends Component {
   state = {
-    energies: []
+    energies: [],
+    cursor: null
   };
 
   componentDidMount() {
@@ -17,7 +18,19 @@ class Battery extends Component {
   }
 
   getEnergies = () => {
-    axios.get(API_URL).then(res => this.setState({ energies: res.data }));
+    // Ask only for what changed since the last sync and merge it into the journal.
+    const params = this.state.cursor ? { since: this.state.cursor } : {};
+    axios.get(API_URL + "changes/", { params }).then(res => {
+      const { cursor, changed, deleted, reset } = res.data;
+      this.setState(previous => {
+        // A reset feed holds the whole journal, replacing what we have.
+        const kept = reset ? [] : previous.energies;
+        const energies = new Map(kept.map(energy => [energy.pk, energy]));
+        deleted.forEach(pk => energies.delete(pk));
+        changed.forEach(energy => energies.set(energy.pk, energy));
+        return { energies: Array.from(energies.values()), cursor };
+      });
+    });
   };
 
   resetState = () => {
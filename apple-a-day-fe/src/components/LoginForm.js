@@ -0,0 +1,66 @@
+import React from "react";
+import { Alert, Button, Container, Form, FormGroup, Input, Label } from "reactstrap";
+
+import axios from "axios";
+
+import { USER_API_URL } from "../constants";
+import { setToken } from "../auth";
+
+class LoginForm extends React.Component {
+  state = {
+    email: "",
+    password: "",
+    error: false
+  };
+
+  onChange = e => {
+    this.setState({ [e.target.name]: e.target.value });
+  };
+
+  login = e => {
+    e.preventDefault();
+    const { email, password } = this.state;
+    axios
+      .post(USER_API_URL + "token/", { email, password })
+      .then(res => {
+        setToken(res.data.token);
+        this.props.onLogin();
+      })
+      .catch(() => this.setState({ error: true }));
+  };
+
+  render() {
+    return (
+      <Container style={{ marginTop: "20px", maxWidth: "400px" }}>
+        {this.state.error && (
+          <Alert color="danger">Unable to log in with those credentials.</Alert>
+        )}
+        <Form onSubmit={this.login}>
+          <FormGroup>
+            <Label for="email">Email:</Label>
+            <Input
+              type="email"
+              name="email"
+              id="email"
+              onChange={this.onChange}
+              value={this.state.email}
+            />
+          </FormGroup>
+          <FormGroup>
+            <Label for="password">Password:</Label>
+            <Input
+              type="password"
+              name="password"
+              id="password"
+              onChange={this.onChange}
+              value={this.state.password}
+            />
+          </FormGroup>
+          <Button type="submit">Log in</Button>
+        </Form>
+      </Container>
+    );
+  }
+}
+
+export default LoginForm;
@@ -1 +1,2 @@
 export const API_URL = "http://localhost:8000/api/energy-journal/";
+export const USER_API_URL = "http://localhost:8000/api/user/";